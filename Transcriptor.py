@@ -1,19 +1,73 @@
 import os
+import time
 import shutil
+import threading
+import hashlib
 import logging
 import traceback
-from typing import List, Dict
-from groq import Groq
-from pydub import AudioSegment
+from typing import List, Dict, Callable, Iterator, Optional, Tuple
 import pandas as pd
 from datetime import timedelta
 import streamlit as st
+from streamlit import runtime
+from streamlit.runtime.scriptrunner import get_script_run_ctx
 import base64
 import json
 
 from streamlit_javascript import st_javascript
 
-GROQ_API_KEY = st.secrets["GROQ_API_KEY"]
+from disk_cache import DiskCache
+from segment_store import SegmentStore, SegmentCache
+from concurrency import iter_completed
+from workspace import Workspace
+from settings import get_secret
+from metrics import timed, record, show_debug_panel
+from job_queue import Job, JobQueue, JOB_WORKERS, PENDING, DONE, FAILED
+from transcript_render import build_transcript_payload, to_csv, to_srt, to_vtt
+from groq_client import get_groq_client, call_with_retries, client_stats
+from audio_processing import (
+    probe_audio, plan_chunks, export_audio_chunk, compute_frame_energy, align_chunks_to_silence,
+    detect_speech_regions, plan_speech_chunks, max_chunk_duration, remap_timestamp,
+    ENCODING_PROFILES, DEFAULT_ENCODING_PROFILE, SILENCE_SEARCH_WINDOW_MS, CHUNK_OVERLAP_MS
+)
+
+GROQ_MODEL = "whisper-large-v3-turbo"
+LANGUAGE = "es"
+
+# Caché persistente de transcripciones (clave: hash del audio + modelo, idioma y contexto)
+CACHE_DIR = os.environ.get("AUDIO_QUAI_CACHE_DIR", ".cache")
+TRANSCRIPTION_CACHE_MAX_BYTES = 200 * 1024 * 1024
+
+# Resultados parciales por segmento, para reanudar trabajos que fallaron a medias
+CHECKPOINT_MAX_BYTES = 100 * 1024 * 1024
+
+# Duración máxima de cada segmento en la aplicación. Sin este tope, el
+# perfil mp3_voz deja hasta ~1 h 45 min en un solo segmento y el texto
+# aparece recién al terminar todo el audio; con segmentos de pocos minutos
+# los primeros llegan en segundos y se transcriben en paralelo.
+PROGRESSIVE_CHUNK_MS = int(float(os.environ.get("AUDIO_QUAI_PROGRESSIVE_CHUNK_MINUTES", "5")) * 60000)
+
+# Número de segmentos que se envían a Groq en paralelo
+TRANSCRIPTION_WORKERS = int(os.environ.get("TRANSCRIPTION_WORKERS", "4"))
+
+# Si es True, los segmentos se envían a Groq desde memoria sin escribirse en disco
+IN_MEMORY_CHUNKS = os.environ.get("AUDIO_QUAI_IN_MEMORY_CHUNKS", "0") == "1"
+
+# Si es True, el reproductor usa una copia liviana del audio en lugar del archivo original
+PLAYBACK_PROXY = os.environ.get("AUDIO_QUAI_PLAYBACK_PROXY", "1") == "1"
+PLAYBACK_PROXY_PROFILE = "mp3_voz"
+PLAYBACK_PROXY_MAX_ENTRIES = 16
+PLAYBACK_PROXY_DIR = os.path.join(CACHE_DIR, "reproduccion")
+
+# Frecuencia con que la página consulta el estado de un trabajo en la cola
+JOB_POLL_SECONDS = 1.0
+
+# Segmentos por párrafo en la vista de la transcripción
+TRANSCRIPT_PARAGRAPH_SIZE = 10
+
+# Audios de reproducción que se están codificando (por hash), para no repetirlos
+_playback_proxy_builds = set()
+_playback_proxy_lock = threading.Lock()
 
 logging.basicConfig(level=logging.INFO)
 
@@ -24,7 +78,8 @@ def format_timestamp(milliseconds: int) -> str:
     seconds = int(milliseconds / 1000)
     return str(timedelta(seconds=seconds))
 
-def transcribe_with_groq(file_path: str, start_time: int, context: str) -> List[Dict]:
+def transcribe_with_groq(file_path: str, start_time: int, context: str,
+                         offset_map: Optional[List] = None, data: Optional[bytes] = None) -> List[Dict]:
     """
     Transcribe un archivo de audio usando el servicio de transcripción de Groq.
 
@@ -32,32 +87,52 @@ def transcribe_with_groq(file_path: str, start_time: int, context: str) -> List[
         file_path (str): Ruta al archivo de audio que necesita ser transcrito.
         start_time (int): Tiempo de inicio del segmento en milisegundos.
         context (str): Contexto proporcionado por el usuario para la transcripción.
+        offset_map (Optional[List]): Mapa de desplazamientos si al audio se le quitaron
+            los silencios; los timestamps se convierten a la línea de tiempo original.
+        data (Optional[bytes]): Contenido del audio ya cargado en memoria; si se indica,
+            file_path solo se usa como nombre del archivo.
     Returns:
         List[Dict]: Lista de diccionarios con la transcripción y timestamps.
     """
-    client = Groq(api_key = GROQ_API_KEY)
+    client = get_groq_client(get_secret("GROQ_API_KEY"))
     filename = os.path.basename(file_path)
 
     try:
-        with open(file_path, "rb") as file:
-            result = client.audio.transcriptions.create(
-                file=(filename, file.read()),
-                model="whisper-large-v3-turbo",
+        if data is None:
+            with open(file_path, "rb") as file:
+                data = file.read()
+
+        with timed("api_transcripcion", archivo=filename, bytes=len(data)) as metric:
+            retries_before = client_stats.snapshot()['retries']
+            result = call_with_retries(
+                client.audio.transcriptions.create,
+                file=(filename, data),
+                model=GROQ_MODEL,
                 prompt=context,
                 response_format="verbose_json",
-                language='es'
-            )   
+                language=LANGUAGE
+            )
+            # Aproximado: con varios segmentos en paralelo incluye reintentos de los demás
+            metric['reintentos'] = client_stats.snapshot()['retries'] - retries_before
+            metric['segmentos'] = len(result.segments)
 
         segments = []
         for segment in result.segments:
+            start = int(segment['start'] * 1000)
+            end = int(segment['end'] * 1000)
+            if offset_map:
+                start = remap_timestamp(start, offset_map)
+                end = max(start, remap_timestamp(end, offset_map, is_end=True))
+            else:
+                start, end = start_time + start, start_time + end
             segment_data = {
-                'start': start_time + int(segment['start'] * 1000),
-                'end': start_time + int(segment['end'] * 1000),
+                'start': start,
+                'end': end,
                 'text': segment['text'].strip()
             }
             segments.append(segment_data)
 
-        logging.info(f"Segmentos transcritos: {segments}")
+        logging.info(f"{filename}: {len(segments)} segmentos transcritos")
         return segments
 
     except Exception as e:
@@ -65,102 +140,583 @@ def transcribe_with_groq(file_path: str, start_time: int, context: str) -> List[
         logging.error(traceback.format_exc())
         raise
 
-def create_audio_chunks(audio_file: str, chunk_size: int, temp_dir: str) -> List[Dict]:
+def plan_audio_chunks(audio_file: str, chunk_size: Optional[int],
+                      encoding_profile: str = DEFAULT_ENCODING_PROFILE,
+                      align_to_silence: bool = True, skip_silence: bool = False,
+                      max_chunk_ms: Optional[int] = None) -> List[Dict]:
+    """
+    Planifica los segmentos en que se dividirá un archivo de audio, sin exportarlos.
+
+    Los cortes se planifican desde los metadatos del contenedor. Opcionalmente,
+    los cortes se mueven a la pausa más cercana y cada segmento repite un breve
+    tramo del anterior, para no partir palabras en los bordes. Con skip_silence
+    se descartan los tramos sin voz antes de subir el audio. Si no se pueden
+    leer los metadatos o el archivo no tiene audio, se lanza ValueError.
+
+    Args:
+        audio_file (str): Ruta al archivo de audio que necesita ser dividido.
+        chunk_size (Optional[int]): Duración de cada segmento en milisegundos. Si es None,
+            se usan los segmentos más largos que caben en el límite de bytes de la API.
+        encoding_profile (str): Perfil de codificación de los segmentos (ver ENCODING_PROFILES).
+        align_to_silence (bool): Si es True, alinea los cortes a pausas y agrega solapamiento.
+        skip_silence (bool): Si es True, elimina los silencios largos y guarda en cada chunk
+            el mapa de desplazamientos a la línea de tiempo original.
+        max_chunk_ms (Optional[int]): Duración máxima de cada segmento cuando chunk_size es
+            None, además del límite de bytes (ver PROGRESSIVE_CHUNK_MS).
+    Returns:
+        List[Dict]: Plan de segmentos (ver audio_processing.plan_chunks).
+    """
+    try:
+        with timed("leer_metadatos", archivo=os.path.basename(audio_file)):
+            audio_info = probe_audio(audio_file)
+    except Exception as e:
+        logging.error(f"create_audio_chunks falló al leer los metadatos del archivo de audio {audio_file}: {e}")
+        logging.error(traceback.format_exc())
+        raise ValueError(f"No se pudo leer el archivo de audio {os.path.basename(audio_file)}: {e}") from e
+
+    chunk_plan = None
+    if skip_silence:
+        try:
+            with timed("decodificar_energia", archivo=os.path.basename(audio_file)):
+                energy = compute_frame_energy(audio_file)
+            speech_regions = detect_speech_regions(energy)
+            speech_duration = sum(end - start for start, end in speech_regions)
+            if speech_regions:
+                max_speech_ms = chunk_size or max_chunk_duration(profile=encoding_profile)
+                if chunk_size is None and max_chunk_ms is not None:
+                    max_speech_ms = min(max_speech_ms, max_chunk_ms)
+                chunk_plan = plan_speech_chunks(speech_regions, max_speech_ms)
+                logging.info(f"{audio_file}: se omiten {audio_info['duration'] - speech_duration} ms sin voz")
+        except Exception as e:
+            logging.warning(f"No se pudieron detectar los silencios en {audio_file}, se envía el audio completo: {e}")
+
+    if chunk_plan is None:
+        # Reservar espacio para mover los cortes y solapar sin exceder el límite de bytes
+        margin_ms = 2 * SILENCE_SEARCH_WINDOW_MS + CHUNK_OVERLAP_MS if align_to_silence else 0
+        chunk_plan = plan_chunks(audio_file, audio_info, chunk_size, profile=encoding_profile, margin_ms=margin_ms,
+                                 max_chunk_ms=max_chunk_ms)
+        if align_to_silence and len(chunk_plan) > 1:
+            try:
+                with timed("decodificar_energia", archivo=os.path.basename(audio_file)):
+                    energy = compute_frame_energy(audio_file)
+                chunk_plan = align_chunks_to_silence(chunk_plan, energy)
+            except Exception as e:
+                logging.warning(f"No se pudieron alinear los cortes a pausas en {audio_file}, se usan cortes fijos: {e}")
+
+    if not chunk_plan:
+        raise ValueError(f"El archivo {os.path.basename(audio_file)} no contiene audio para transcribir")
+
+    logging.info(
+        f"{audio_file}: {audio_info['duration']} ms, {audio_info['bit_rate']} bit/s, "
+        f"{audio_info['channels']} canales, {len(chunk_plan)} segmentos"
+    )
+    return chunk_plan
+
+def export_chunk(audio_file: str, chunk: Dict, counter: int, temp_dir: str,
+                 encoding_profile: str = DEFAULT_ENCODING_PROFILE, in_memory: bool = False) -> Dict:
+    """
+    Exporta un segmento planificado por plan_audio_chunks.
+
+    Args:
+        audio_file (str): Ruta al archivo de audio de origen.
+        chunk (Dict): Segmento del plan.
+        counter (int): Posición del segmento en el plan, usada para nombrar el archivo.
+        temp_dir (str): Directorio donde se almacenará el segmento.
+        encoding_profile (str): Perfil de codificación del segmento.
+        in_memory (bool): Si es True, el segmento se codifica en memoria (llave data).
+    Returns:
+        Dict: Información del chunk creado.
+    """
+    chunk_info = {
+        'file_path': audio_file,
+        'data': None,
+        'start_time': chunk['start_time'],
+        'keep_start': chunk['keep_start'],
+        'keep_end': chunk['keep_end'],
+        'offset_map': chunk.get('offset_map')
+    }
+    if chunk['passthrough']:
+        return chunk_info
+
+    file_name = os.path.splitext(os.path.basename(audio_file))[0]
+    extension = ENCODING_PROFILES[encoding_profile]['extension']
+    chunk_info['file_path'] = os.path.join(temp_dir, f"{counter}_{file_name}{extension}")
+    try:
+        with timed("exportar_segmento", segmento=counter, perfil=encoding_profile) as metric:
+            chunk_info['data'] = export_audio_chunk(
+                audio_file, chunk['start_time'], chunk['duration'], None if in_memory else chunk_info['file_path'],
+                encoding_profile, regions=chunk.get('regions')
+            )
+            metric['bytes'] = len(chunk_info['data']) if in_memory else os.path.getsize(chunk_info['file_path'])
+    except Exception as e:
+        error_message = f"create_audio_chunks falló al exportar el segmento {counter}: {e}"
+        logging.error(error_message)
+        logging.error(traceback.format_exc())
+        raise Exception(error_message)
+    return chunk_info
+
+def create_audio_chunks(audio_file: str, chunk_size: Optional[int], temp_dir: str,
+                        encoding_profile: str = DEFAULT_ENCODING_PROFILE,
+                        align_to_silence: bool = True, skip_silence: bool = False,
+                        in_memory: bool = False) -> List[Dict]:
     """
     Divide un archivo de audio en segmentos más pequeños.
 
+    Los segmentos se planifican con plan_audio_chunks y cada uno se extrae con
+    ffmpeg buscando directamente en el contenedor, sin decodificar el archivo
+    completo en memoria.
+
     Args:
         audio_file (str): Ruta al archivo de audio que necesita ser dividido.
-        chunk_size (int): Duración de cada segmento en milisegundos.
+        chunk_size (Optional[int]): Duración de cada segmento en milisegundos. Si es None,
+            se usan los segmentos más largos que caben en el límite de bytes de la API.
         temp_dir (str): Directorio donde se almacenarán los segmentos temporales.
+        encoding_profile (str): Perfil de codificación de los segmentos (ver ENCODING_PROFILES).
+        align_to_silence (bool): Si es True, alinea los cortes a pausas y agrega solapamiento.
+        skip_silence (bool): Si es True, elimina los silencios largos y guarda en cada chunk
+            el mapa de desplazamientos a la línea de tiempo original.
+        in_memory (bool): Si es True, los segmentos se codifican en memoria (llave data)
+            en lugar de escribirse en temp_dir.
     Returns:
         List[Dict]: Lista de diccionarios con información de los chunks creados.
     """
     os.makedirs(temp_dir, exist_ok=True)
-    file_name = os.path.splitext(os.path.basename(audio_file))[0]
+    chunk_plan = plan_audio_chunks(audio_file, chunk_size, encoding_profile, align_to_silence, skip_silence)
+    return [
+        export_chunk(audio_file, chunk, counter, temp_dir, encoding_profile, in_memory)
+        for counter, chunk in enumerate(chunk_plan)
+    ]
 
-    try:
-        audio = AudioSegment.from_file(audio_file)
-    except Exception as e:
-        logging.error(f"create_audio_chunks falló al cargar el archivo de audio {audio_file}: {e}")
-        logging.error(traceback.format_exc())
-        return []
+def merge_chunk_segments(chunk_files: List[Optional[Dict]], chunk_segments: List[Optional[List[Dict]]]) -> List[Dict]:
+    """
+    Une los segmentos transcritos de cada chunk eliminando los duplicados que
+    produce el solapamiento entre chunks consecutivos.
 
-    start = 0
-    end = chunk_size
-    counter = 0
-    chunk_files = []
+    Cada segmento se conserva solo si su punto medio cae dentro del tramo
+    keep_start/keep_end del chunk que lo transcribió; además se descarta un
+    segmento con el mismo texto que el anterior si ambos se superponen en el tiempo.
+    Los chunks que aún no terminan (None) se omiten, lo que permite unir
+    resultados parciales.
 
-    while start < len(audio):
-        chunk = audio[start:end]
-        chunk_file_path = os.path.join(temp_dir, f"{counter}_{file_name}.mp3")
-        try:
-            chunk.export(chunk_file_path, format="mp3")
-            chunk_files.append({
-                'file_path': chunk_file_path,
-                'start_time': start
-            })
-        except Exception as e:
-            error_message = f"create_audio_chunks falló al exportar el segmento {counter}: {e}"
-            logging.error(error_message)
-            logging.error(traceback.format_exc())
-            raise Exception(error_message)
-        start += chunk_size
-        end += chunk_size
-        counter += 1
-    return chunk_files
+    Args:
+        chunk_files (List[Optional[Dict]]): Chunks ordenados por start_time.
+        chunk_segments (List[Optional[List[Dict]]]): Segmentos transcritos de cada chunk, en el mismo orden.
+    Returns:
+        List[Dict]: Segmentos unidos y ordenados por start.
+    """
+    merged = []
+    last_index = len(chunk_files) - 1
+    for index, (chunk_info, segments) in enumerate(zip(chunk_files, chunk_segments)):
+        if segments is None:
+            continue
+        for segment in segments:
+            middle = (segment['start'] + segment['end']) / 2
+            if index > 0 and middle < chunk_info['keep_start']:
+                continue
+            if index < last_index and middle >= chunk_info['keep_end']:
+                continue
+            if merged and segment['text'] == merged[-1]['text'] and segment['start'] < merged[-1]['end']:
+                continue
+            merged.append(segment)
+    return merged
 
-def transcribe_local_audio(audio_file: str, chunk_size: int, context: str, temp_dir: str = "temp_chunks") -> pd.DataFrame:
+def segments_to_dataframe(segments: List[Dict]) -> pd.DataFrame:
     """
-    Transcribe un archivo de audio local y retorna un DataFrame con timestamps.
+    Construye el DataFrame de la transcripción a partir de la lista de segmentos.
+    Los tiempos formateados se calculan al exportar, no se guardan como columnas.
+
+    Args:
+        segments (List[Dict]): Segmentos con las llaves start, end y text.
+    Returns:
+        pd.DataFrame: DataFrame con columnas start, end (ms) y text.
+    """
+    return pd.DataFrame(segments, columns=['start', 'end', 'text']).astype({'start': 'int64', 'end': 'int64'})
+
+def iter_transcription(audio_file: str, chunk_size: Optional[int], context: str,
+                       workspace: Optional[Workspace] = None,
+                       max_workers: int = TRANSCRIPTION_WORKERS,
+                       encoding_profile: str = DEFAULT_ENCODING_PROFILE,
+                       skip_silence: bool = False,
+                       checkpoints: Optional[DiskCache] = None,
+                       max_chunk_ms: Optional[int] = None) -> Iterator[Dict]:
+    """
+    Transcribe un archivo de audio local entregando los resultados de cada
+    segmento a medida que terminan, para poder mostrarlos progresivamente.
+
+    Los segmentos se exportan y se envían a Groq en paralelo (hasta max_workers
+    a la vez). Si un segmento falla, se cancelan los que aún no comienzan y se
+    propaga el error.
+
+    Si se indica un almacén de checkpoints, el resultado de cada segmento se
+    guarda apenas termina, con una clave basada en el hash del archivo y el
+    plan de segmentos. Al reintentar un trabajo fallido solo se transcriben
+    los segmentos que faltan.
 
     Args:
         audio_file (str): Ruta al archivo de audio local (MP3 o MP4).
-        chunk_size (int): Duración de cada segmento en milisegundos (por defecto 25 minutos).
+        chunk_size (Optional[int]): Duración de cada segmento en milisegundos. Si es None, se
+            planifica según el límite de bytes de la API.
         context (str): Contexto proporcionado por el usuario para la transcripción.
-        temp_dir (str): Directorio para almacenar los segmentos temporales.
+        workspace (Optional[Workspace]): Espacio de trabajo del trabajo. Si es None, se crea
+            uno propio que se elimina al terminar; si se indica, solo se eliminan los segmentos.
+        max_workers (int): Número máximo de segmentos transcritos simultáneamente (1 = secuencial).
+        encoding_profile (str): Perfil de codificación de los segmentos (ver ENCODING_PROFILES).
+        skip_silence (bool): Si es True, no se envían a la API los tramos sin voz; los
+            timestamps siguen refiriéndose al audio original.
+        checkpoints (Optional[DiskCache]): Almacén donde se guardan los resultados por segmento.
+        max_chunk_ms (Optional[int]): Duración máxima de cada segmento (ver PROGRESSIVE_CHUNK_MS).
     Returns:
-        pd.DataFrame: DataFrame con columnas start_time, end_time y text.
+        Iterator[Dict]: Un diccionario por segmento terminado, con index (posición en el
+            plan), total, completed, chunk (entrada del plan) y segments.
     """
     if not os.path.exists(audio_file):
         raise FileNotFoundError(f"No se encontró el archivo de audio: {audio_file}")
 
+    own_workspace = workspace is None
+    if own_workspace:
+        workspace = Workspace(in_memory=IN_MEMORY_CHUNKS)
+    temp_dir = workspace.subdir("chunks")
+
+    started = time.perf_counter()
     try:
-        chunk_files = create_audio_chunks(audio_file, chunk_size, temp_dir)
+        chunk_plan = sorted(
+            plan_audio_chunks(audio_file, chunk_size, encoding_profile, skip_silence=skip_silence,
+                              max_chunk_ms=max_chunk_ms),
+            key=lambda c: c['start_time']
+        )
+        audio_hash = file_content_hash(audio_file) if checkpoints is not None else None
+
+        def checkpoint_key(chunk: Dict) -> str:
+            return DiskCache.make_key(
+                "segmento", audio_hash, GROQ_MODEL, LANGUAGE, context, encoding_profile,
+                chunk['start_time'], chunk['duration'], chunk.get('regions')
+            )
+
+        def transcribe_chunk(indexed_chunk) -> List[Dict]:
+            counter, chunk = indexed_chunk
+            if checkpoints is not None:
+                segments = checkpoints.get(checkpoint_key(chunk))
+                if segments is not None:
+                    logging.info(f"Segmento {counter} de {audio_file} recuperado del checkpoint")
+                    record("checkpoint", segmento=counter)
+                    return segments
 
-        transcripts = []
-        for chunk_info in chunk_files:
+            chunk_info = export_chunk(audio_file, chunk, counter, temp_dir, encoding_profile, workspace.in_memory)
             try:
                 logging.info(f"Transcribiendo {chunk_info['file_path']}")
-                transcript_data = transcribe_with_groq(
+                segments = transcribe_with_groq(
                     chunk_info['file_path'],
                     chunk_info['start_time'],
-                    context
+                    context,
+                    offset_map=chunk_info.get('offset_map'),
+                    data=chunk_info.get('data')
                 )
-                transcripts.extend(transcript_data)
             except Exception as e:
                 error_message = f"Falló la transcripción del archivo {chunk_info['file_path']}: {e}"
                 logging.error(error_message)
                 logging.error(traceback.format_exc())
                 raise Exception(error_message)
+            finally:
+                # El segmento exportado ya no se necesita
+                if chunk_info['file_path'].startswith(temp_dir) and os.path.exists(chunk_info['file_path']):
+                    os.remove(chunk_info['file_path'])
 
-        # Crear DataFrame y formatear timestamps
-        df = pd.DataFrame(transcripts)
-        df['start_time'] = df['start'].apply(format_timestamp)
-        df['end_time'] = df['end'].apply(format_timestamp)
+            if checkpoints is not None:
+                checkpoints.set(checkpoint_key(chunk), segments)
+            return segments
 
-        # Reordenar y limpiar columnas
-        df = df[['start', 'end', 'start_time', 'end_time', 'text']]
+        completed = 0
+        for index, segments in iter_completed(transcribe_chunk, list(enumerate(chunk_plan)), max_workers):
+            completed += 1
+            yield {
+                'index': index,
+                'total': len(chunk_plan),
+                'completed': completed,
+                'chunk': chunk_plan[index],
+                'segments': segments
+            }
+
+        # El trabajo terminó completo: los checkpoints ya no son necesarios
+        if checkpoints is not None:
+            for chunk in chunk_plan:
+                checkpoints.delete(checkpoint_key(chunk))
+        record(
+            "transcripcion_total", (time.perf_counter() - started) * 1000,
+            archivo=os.path.basename(audio_file), segmentos_audio=len(chunk_plan), perfil=encoding_profile
+        )
+        logging.info(f"Estadísticas del cliente de Groq: {client_stats.snapshot()}")
 
     finally:
         # Limpieza de archivos temporales
-        if os.path.exists(temp_dir):
+        if own_workspace:
+            workspace.cleanup()
+        elif os.path.exists(temp_dir):
             try:
                 shutil.rmtree(temp_dir)
             except Exception as e:
                 logging.error(f"Error al eliminar el directorio temporal {temp_dir}: {e}")
 
-    return df
+def transcribe_local_audio(audio_file: str, chunk_size: Optional[int], context: str,
+                           workspace: Optional[Workspace] = None,
+                           max_workers: int = TRANSCRIPTION_WORKERS,
+                           encoding_profile: str = DEFAULT_ENCODING_PROFILE,
+                           skip_silence: bool = False,
+                           checkpoints: Optional[DiskCache] = None,
+                           max_chunk_ms: Optional[int] = None,
+                           on_progress: Optional[Callable[[Dict, List[Dict]], None]] = None) -> pd.DataFrame:
+    """
+    Transcribe un archivo de audio local y retorna un DataFrame con timestamps.
+
+    Consume iter_transcription y reúne los segmentos en el orden de su
+    start_time; los argumentos son los mismos, más on_progress: una función
+    que, si se indica, recibe cada actualización de iter_transcription junto
+    con la transcripción parcial unida hasta ese momento.
+
+    Returns:
+        pd.DataFrame: DataFrame con columnas start, end (ms) y text.
+    """
+    chunks = []
+    chunk_segments = []
+    for update in iter_transcription(
+        audio_file, chunk_size, context, workspace=workspace, max_workers=max_workers,
+        encoding_profile=encoding_profile, skip_silence=skip_silence, checkpoints=checkpoints,
+        max_chunk_ms=max_chunk_ms
+    ):
+        if not chunks:
+            chunks = [None] * update['total']
+            chunk_segments = [None] * update['total']
+        chunks[update['index']] = update['chunk']
+        chunk_segments[update['index']] = update['segments']
+        if on_progress is not None:
+            on_progress(update, merge_chunk_segments(chunks, chunk_segments))
+
+    return segments_to_dataframe(merge_chunk_segments(chunks, chunk_segments))
+
+def audio_content_hash(data) -> str:
+    """
+    Calcula el hash SHA-256 del contenido de un audio (bytes o memoryview).
+    """
+    return hashlib.sha256(data).hexdigest()
+
+def file_content_hash(file_path: str, block_size: int = 1024 * 1024) -> str:
+    """
+    Calcula el hash SHA-256 de un archivo leyéndolo por bloques.
+    """
+    digest = hashlib.sha256()
+    with open(file_path, "rb") as f:
+        for block in iter(lambda: f.read(block_size), b""):
+            digest.update(block)
+    return digest.hexdigest()
+
+@st.cache_resource
+def get_transcription_cache() -> SegmentCache:
+    """
+    Retorna la caché de transcripciones compartida por todas las sesiones.
+    """
+    return SegmentCache(os.path.join(CACHE_DIR, "transcripciones"), TRANSCRIPTION_CACHE_MAX_BYTES)
+
+@st.cache_resource
+def get_checkpoint_store() -> DiskCache:
+    """
+    Retorna el almacén de checkpoints por segmento compartido por todas las sesiones.
+    """
+    return DiskCache(os.path.join(CACHE_DIR, "checkpoints.sqlite"), CHECKPOINT_MAX_BYTES)
+
+def playback_proxy_path(content_hash: str) -> str:
+    """
+    Retorna la ruta en disco del audio de reproducción de un contenido.
+    """
+    return os.path.join(PLAYBACK_PROXY_DIR, f"{content_hash}.mp3")
+
+def build_playback_proxy(audio_path: str, content_hash: str) -> Optional[str]:
+    """
+    Codifica una copia liviana del audio para el reproductor (mono, baja
+    tasa de bits), de modo que empiece a sonar y permita saltar a cualquier
+    punto sin descargar el archivo original completo. Se guarda en disco por
+    el hash del contenido (sobrevive a reinicios del servidor) y solo se
+    conservan las PLAYBACK_PROXY_MAX_ENTRIES copias usadas más recientemente.
+
+    Args:
+        audio_path (str): Ruta al audio original.
+        content_hash (str): Hash del contenido del audio.
+    Returns:
+        Optional[str]: Ruta de la copia, o None si no se pudo generar.
+    """
+    path = playback_proxy_path(content_hash)
+    if os.path.exists(path):
+        return path
+
+    temp_path = f"{path}.{threading.get_ident()}.tmp"
+    try:
+        os.makedirs(PLAYBACK_PROXY_DIR, exist_ok=True)
+        with timed("audio_reproduccion_proxy", archivo=os.path.basename(audio_path)) as metric:
+            duration = probe_audio(audio_path)['duration']
+            export_audio_chunk(audio_path, 0, duration, temp_path, profile=PLAYBACK_PROXY_PROFILE)
+            os.replace(temp_path, path)
+            metric['bytes'] = os.path.getsize(path)
+
+        proxies = sorted(
+            (os.path.join(PLAYBACK_PROXY_DIR, name) for name in os.listdir(PLAYBACK_PROXY_DIR) if name.endswith(".mp3")),
+            key=os.path.getmtime, reverse=True
+        )
+        for old_path in proxies[PLAYBACK_PROXY_MAX_ENTRIES:]:
+            os.remove(old_path)
+        return path
+    except Exception as e:
+        logging.warning(f"No se pudo generar el audio de reproducción de {audio_path}: {e}")
+        if os.path.exists(temp_path):
+            os.remove(temp_path)
+        return None
+
+def start_playback_proxy(data: bytes, file_name: str, content_hash: str) -> None:
+    """
+    Genera el audio de reproducción en un hilo de fondo, con su propia copia
+    del audio, para no bloquear la página ni el trabajo de transcripción.
+    El contenido se reserva antes de lanzar el hilo: si ya hay una copia en
+    curso no se lanza otro hilo ni se vuelve a escribir el audio en disco.
+    """
+    if not PLAYBACK_PROXY or os.path.exists(playback_proxy_path(content_hash)):
+        return
+    with _playback_proxy_lock:
+        if content_hash in _playback_proxy_builds:
+            return
+        _playback_proxy_builds.add(content_hash)
+
+    def build() -> None:
+        try:
+            with Workspace() as workspace:
+                audio_path = workspace.file_path(file_name)
+                with open(audio_path, "wb") as f:
+                    f.write(data)
+                build_playback_proxy(audio_path, content_hash)
+        except Exception as e:
+            logging.warning(f"No se pudo preparar el audio de reproducción de {file_name}: {e}")
+        finally:
+            with _playback_proxy_lock:
+                _playback_proxy_builds.discard(content_hash)
+
+    try:
+        threading.Thread(target=build, name="audio_reproduccion", daemon=True).start()
+    except Exception:
+        with _playback_proxy_lock:
+            _playback_proxy_builds.discard(content_hash)
+        raise
+
+def serve_playback_audio(audio_file, content_hash: str) -> Tuple[str, str]:
+    """
+    Publica el audio del reproductor como un recurso aparte, servido por el
+    servidor de archivos multimedia de Streamlit (que admite peticiones por
+    rangos), en lugar de incrustarlo en base64 dentro del HTML. Si la copia
+    liviana todavía no existe se sirve el archivo original, se indica en la
+    página y se genera la copia en segundo plano para las próximas cargas.
+
+    Args:
+        audio_file: Archivo subido con st.file_uploader.
+        content_hash (str): Hash del contenido del audio.
+    Returns:
+        Tuple[str, str]: URL del audio y su tipo MIME.
+    """
+    data, mimetype = audio_file.getvalue(), audio_file.type or "audio/mpeg"
+    if PLAYBACK_PROXY:
+        proxy_path = playback_proxy_path(content_hash)
+        if os.path.exists(proxy_path):
+            os.utime(proxy_path)
+            with open(proxy_path, "rb") as f:
+                data, mimetype = f.read(), "audio/mpeg"
+        else:
+            start_playback_proxy(data, audio_file.name, content_hash)
+            st.caption("Preparando una versión liviana del audio para el reproductor; mientras tanto se reproduce el archivo original.")
+
+    if not runtime.exists():
+        # Sin servidor de Streamlit (por ejemplo, en modo bare) se incrusta el audio
+        return f"data:{mimetype};base64,{base64.b64encode(data).decode('utf-8')}", mimetype
+
+    url = runtime.get_instance().media_file_mgr.add(data, mimetype, "transcriptor.reproductor")
+    # El componente se muestra en un iframe: la ruta relativa respeta el baseUrlPath del servidor
+    return url.lstrip("/"), mimetype
+
+@st.cache_resource
+def get_job_queue() -> JobQueue:
+    """
+    Retorna la cola de trabajos de transcripción compartida por todas las sesiones.
+    """
+    return JobQueue(JOB_WORKERS)
+
+def current_user_id() -> str:
+    """
+    Retorna el identificador de la sesión de Streamlit, usado para repartir
+    los turnos de la cola entre usuarios.
+    """
+    ctx = get_script_run_ctx()
+    return ctx.session_id if ctx is not None else "local"
+
+def run_transcription_job(job: Job, data: bytes, file_name: str, context: str, encoding_profile: str,
+                          skip_silence: bool, cache_key: str, transcription_cache: SegmentCache,
+                          checkpoints: DiskCache) -> pd.DataFrame:
+    """
+    Trabajo de la cola: transcribe el audio subido en su propio espacio de
+    trabajo, reporta el avance y el texto parcial en el Job y guarda el
+    resultado en la caché de transcripciones. En paralelo genera el audio
+    de reproducción, para que esté listo al terminar la transcripción.
+
+    Returns:
+        pd.DataFrame: DataFrame con columnas start, end (ms) y text.
+    """
+    start_playback_proxy(data, file_name, audio_content_hash(data))
+
+    with Workspace(in_memory=IN_MEMORY_CHUNKS) as workspace:
+        audio_path = workspace.file_path(file_name)
+        with timed("guardar_audio", archivo=file_name, bytes=len(data)):
+            with open(audio_path, "wb") as f:
+                f.write(data)
+        del data
+
+        # Transcribir el audio en segmentos de pocos minutos (y bajo el límite de bytes de
+        # la API), para mostrar el texto a medida que avanza
+        df_transcription = transcribe_local_audio(
+            audio_path, chunk_size=None, context=context, workspace=workspace,
+            encoding_profile=encoding_profile, skip_silence=skip_silence, checkpoints=checkpoints,
+            max_chunk_ms=PROGRESSIVE_CHUNK_MS,
+            on_progress=lambda update, transcripts: job.update(update['completed'], update['total'], transcripts)
+        )
+
+    # Una transcripción vacía no se guarda: quedaría como resultado válido para siempre
+    if len(df_transcription):
+        transcription_cache.set(cache_key, SegmentStore.from_dataframe(df_transcription))
+    else:
+        logging.warning(f"La transcripción de {file_name} no produjo segmentos; no se guarda en la caché")
+    return df_transcription
+
+@st.fragment(run_every=JOB_POLL_SECONDS)
+def show_job_progress(job_id: str) -> None:
+    """
+    Muestra el estado de un trabajo de la cola (posición en la fila, o barra
+    de progreso con tiempo restante estimado y el texto ya transcrito) y se
+    actualiza periódicamente. Cuando el trabajo termina vuelve a ejecutar la
+    página completa para mostrar el resultado.
+    """
+    job_queue = get_job_queue()
+    job = job_queue.get(job_id)
+    state = job.snapshot() if job is not None else None
+    if state is None or state['status'] in (DONE, FAILED):
+        st.rerun()
+
+    if state['status'] == PENDING:
+        st.info(f"Transcripción en cola: {job_queue.position(job)} trabajos antes que este.")
+        return
+
+    if not state['total']:
+        st.progress(0.0, text="Preparando el audio...")
+        return
+
+    elapsed = time.time() - state['started_at']
+    remaining = elapsed / state['completed'] * (state['total'] - state['completed']) if state['completed'] else 0
+    st.progress(
+        state['completed'] / state['total'],
+        text=f"Transcribiendo: {state['completed']} de {state['total']} fragmentos "
+             f"(tiempo restante estimado {format_timestamp(remaining * 1000)})"
+    )
+    st.text("\n".join(f"[{format_timestamp(s['start'])}] {s['text']}" for s in state['partial']))
 
 def main(): 
     st.title("Transcripción de Audio a Texto")
@@ -182,54 +738,72 @@ def main():
         help="Este contexto ayudará a mejorar la precisión de la transcripción"
     )
     
+    encoding_profile = st.sidebar.selectbox(
+        "Perfil de codificación",
+        list(ENCODING_PROFILES),
+        index=list(ENCODING_PROFILES).index(DEFAULT_ENCODING_PROFILE),
+        help="Formato en que se envía el audio a la API. Los perfiles de voz reducen el tamaño de cada envío "
+             "sin afectar la precisión de forma apreciable."
+    )
+    st.sidebar.caption(ENCODING_PROFILES[encoding_profile]['description'])
+
+    skip_silence = st.sidebar.checkbox(
+        "Omitir silencios",
+        value=False,
+        help="Quita las pausas largas, cortes y esperas antes de enviar el audio, reduciendo el tiempo y costo "
+             "de la transcripción. Los tiempos de la transcripción siguen correspondiendo al audio original."
+    )
+
     audio_file = st.sidebar.file_uploader("Subir archivo de audio", type=["mp3", "mp4", "wav","m4a"])
+    if st.sidebar.checkbox("Mostrar métricas de rendimiento", value=False):
+        show_debug_panel()
 
     if audio_file is not None and context:
-        # Crear directorio temporal si no existe
-        os.makedirs("temp_dir", exist_ok=True)
-        # Guardar archivo subido temporalmente
-        temp_audio_path = os.path.join("temp_dir", audio_file.name)
-        with open(temp_audio_path, "wb") as f:
-            f.write(audio_file.read())
-
-        # Determinar tamaño del archivo y ajustar el chunk_size
-        file_size_mb = os.path.getsize(temp_audio_path) / (1024 * 1024)
-        chunk_size = 25 * 60000 if file_size_mb > 25 else len(AudioSegment.from_file(temp_audio_path))
-
-        # Transcribir el audio
-        df_transcription = transcribe_local_audio(temp_audio_path, chunk_size=chunk_size, context=context)
-
-        # Preparar los datos de transcripción
-        df_transcription['start_seconds'] = df_transcription['start'] / 1000
-        df_transcription['end_seconds'] = df_transcription['end'] / 1000
-
-        # Leer el archivo de audio y codificarlo en base64
-        with open(temp_audio_path, "rb") as f:
-            audio_bytes = f.read()
-            base64_audio = base64.b64encode(audio_bytes).decode('utf-8')
-
-        # Construir el HTML de la transcripción
-        transcription_html = ""
-        sentence_count = 0
-        current_paragraph = ""
-        
-        for idx, row in df_transcription.iterrows():
-            start = row['start_seconds']
-            end = row['end_seconds']
-            text = row['text']
-            
-            current_paragraph += f"<span data-start='{start}' data-end='{end}' contenteditable='true'>{text} </span>"
-            sentence_count += 1
-            
-            # Cada 5 oraciones, crear un nuevo párrafo
-            if sentence_count >= 10:
-                transcription_html += f"<p>{current_paragraph}</p>"
-                current_paragraph = ""
-                sentence_count = 0
-        
-        # Agregar el último párrafo si quedaron oraciones
-        if current_paragraph:
-            transcription_html += f"<p>{current_paragraph}</p>"
+        # Buscar la transcripción en la caché antes de decodificar o llamar a la API
+        transcription_cache = get_transcription_cache()
+        content_hash = audio_content_hash(audio_file.getbuffer())
+        cache_key = DiskCache.make_key(
+            "transcripcion", content_hash, GROQ_MODEL, LANGUAGE, context,
+            encoding_profile, skip_silence
+        )
+        cached_store = transcription_cache.get(cache_key)
+
+        if cached_store is not None:
+            logging.info(f"Transcripción de {audio_file.name} recuperada de la caché")
+            df_transcription = cached_store.to_dataframe()
+        else:
+            # La transcripción corre en la cola compartida; la sesión solo guarda el id del trabajo
+            job_queue = get_job_queue()
+            session_jobs = st.session_state.setdefault("transcription_jobs", {})
+            job = job_queue.get(session_jobs[cache_key]) if cache_key in session_jobs else None
+            if job is None:
+                job = job_queue.submit(
+                    current_user_id(), run_transcription_job, bytes(audio_file.getbuffer()), audio_file.name,
+                    context, encoding_profile, skip_silence, cache_key, transcription_cache, get_checkpoint_store(),
+                    key=cache_key
+                )
+                session_jobs[cache_key] = job.id
+
+            state = job.snapshot()
+            if state['status'] == FAILED:
+                st.error(f"Error en la transcripción: {state['error']}")
+                if st.button("Reintentar"):
+                    del session_jobs[cache_key]
+                    st.rerun()
+                return
+            if state['status'] != DONE:
+                show_job_progress(job.id)
+                return
+            df_transcription = state['result']
+
+        # Publicar el audio del reproductor como un recurso aparte
+        with timed("audio_reproduccion", archivo=audio_file.name, proxy=PLAYBACK_PROXY):
+            audio_url, audio_mimetype = serve_playback_audio(audio_file, content_hash)
+
+        render_started = time.perf_counter()
+
+        # Segmentos y HTML de los párrafos; el navegador solo monta los párrafos cercanos a la vista
+        transcript_data = build_transcript_payload(df_transcription, TRANSCRIPT_PARAGRAPH_SIZE)
 
         # Actualizar los estilos CSS para incluir el formato de párrafos
         html_content = f"""
@@ -311,15 +885,13 @@ def main():
         </style>
         <div class="container">
             <div class="audio-container">
-                <audio id="audio" controls>
-                    <source src="data:audio/mp3;base64,{base64_audio}" type="audio/mp3">
+                <audio id="audio" controls preload="metadata">
+                    <source src="{audio_url}" type="{audio_mimetype}">
                     Tu navegador no soporta el elemento de audio.
                 </audio>
             </div>
             <div class="content-container">
-                <div id="transcription">
-                    {transcription_html}
-                </div>
+                <div id="transcription"></div>
                 <div class="button-container">
                     <button class="download-btn" onclick="downloadTranscription()">Descargar Transcripción Corregida</button>
                 </div>
@@ -328,31 +900,114 @@ def main():
         <script>
         const audio = document.getElementById('audio');
         const transcription = document.getElementById('transcription');
-        const spans = transcription.getElementsByTagName('span');
+        const container = document.querySelector('.content-container');
+        const transcript = {transcript_data};
+        const PARAGRAPH_SIZE = {TRANSCRIPT_PARAGRAPH_SIZE};
+        const SCROLL_INTERVAL_MS = 1000;
+        // Textos editados; se conservan aunque el párrafo se desmonte
+        const texts = transcript.text.slice();
+        const paragraphs = [];
+        let activeIndex = -1;
+        let lastScroll = 0;
 
-        audio.ontimeupdate = function() {{
-          var currentTime = audio.currentTime;
-          for (var i = 0; i < spans.length; i++) {{
-            var span = spans[i];
-            var start = parseFloat(span.dataset.start);
-            var end = parseFloat(span.dataset.end);
-            if (currentTime >= start && currentTime <= end) {{
-              span.classList.add('highlight');
-              // Auto-scroll to the highlighted span
-              span.scrollIntoView({{ behavior: 'smooth', block: 'center', inline: 'nearest' }});
+        function spanAt(index) {{
+          const paragraph = paragraphs[Math.floor(index / PARAGRAPH_SIZE)];
+          return paragraph ? paragraph.querySelector(`span[data-index="${{index}}"]`) : null;
+        }}
+
+        function mountParagraph(k) {{
+          const paragraph = paragraphs[k];
+          if (paragraph.dataset.mounted) return;
+          paragraph.innerHTML = transcript.paragraphs[k];
+          paragraph.querySelectorAll('span[data-index]').forEach(span => {{
+            const index = Number(span.dataset.index);
+            if (texts[index] !== transcript.text[index]) span.textContent = texts[index] + ' ';
+            if (index === activeIndex) span.classList.add('highlight');
+          }});
+          paragraph.style.minHeight = '';
+          paragraph.dataset.mounted = '1';
+        }}
+
+        function unmountParagraph(k) {{
+          const paragraph = paragraphs[k];
+          // No se desmonta el párrafo que se está editando
+          if (!paragraph.dataset.mounted || paragraph.contains(document.activeElement)) return;
+          paragraph.style.minHeight = paragraph.offsetHeight + 'px';
+          paragraph.innerHTML = '';
+          delete paragraph.dataset.mounted;
+        }}
+
+        // Párrafos vacíos con una altura estimada, para que la barra de desplazamiento sea estable
+        const fontSize = parseFloat(getComputedStyle(transcription).fontSize);
+        const charsPerLine = Math.max(20, Math.floor(transcription.clientWidth / (fontSize * 0.5)));
+        const fragment = document.createDocumentFragment();
+        transcript.paragraphs.forEach((html, k) => {{
+          const paragraph = document.createElement('p');
+          let chars = 0;
+          for (let i = k * PARAGRAPH_SIZE; i < Math.min((k + 1) * PARAGRAPH_SIZE, texts.length); i++) chars += texts[i].length + 1;
+          paragraph.dataset.paragraph = k;
+          paragraph.style.minHeight = (Math.ceil(chars / charsPerLine) * fontSize * 1.5) + 'px';
+          paragraphs.push(paragraph);
+          fragment.appendChild(paragraph);
+        }});
+        transcription.appendChild(fragment);
+
+        // Solo se montan los párrafos cercanos a la zona visible
+        const observer = new IntersectionObserver(entries => {{
+          entries.forEach(entry => {{
+            const k = Number(entry.target.dataset.paragraph);
+            if (entry.isIntersecting) mountParagraph(k); else unmountParagraph(k);
+          }});
+        }}, {{ root: container, rootMargin: '1000px 0px' }});
+        paragraphs.forEach(paragraph => observer.observe(paragraph));
+
+        // Búsqueda binaria del segmento activo sobre los inicios ordenados
+        function findSegment(time) {{
+          let low = 0, high = transcript.start.length - 1, found = -1;
+          while (low <= high) {{
+            const mid = (low + high) >> 1;
+            if (transcript.start[mid] <= time) {{
+              found = mid;
+              low = mid + 1;
             }} else {{
-              span.classList.remove('highlight');
+              high = mid - 1;
             }}
           }}
+          return (found >= 0 && time <= transcript.end[found]) ? found : -1;
+        }}
+
+        audio.ontimeupdate = function() {{
+          const index = findSegment(audio.currentTime);
+          if (index === activeIndex) return;
+          // Solo se tocan el segmento anterior y el nuevo
+          const previous = activeIndex >= 0 ? spanAt(activeIndex) : null;
+          if (previous) previous.classList.remove('highlight');
+          activeIndex = index;
+          if (index < 0) return;
+          // El párrafo de la posición de reproducción se monta aunque no esté a la vista
+          mountParagraph(Math.floor(index / PARAGRAPH_SIZE));
+          const span = spanAt(index);
+          span.classList.add('highlight');
+          // Auto-scroll al segmento resaltado, como máximo una vez por intervalo
+          const now = Date.now();
+          if (now - lastScroll >= SCROLL_INTERVAL_MS) {{
+            lastScroll = now;
+            span.scrollIntoView({{ behavior: 'smooth', block: 'center', inline: 'nearest' }});
+          }}
         }};
 
-        for (var i = 0; i < spans.length; i++) {{
-          spans[i].addEventListener('click', function(e) {{
-            var start = parseFloat(this.dataset.start);
-            audio.currentTime = start;
-            audio.play();
-          }});
-        }}
+        // Un solo listener para todos los segmentos
+        transcription.addEventListener('click', function(e) {{
+          const span = e.target.closest('span[data-index]');
+          if (!span) return;
+          audio.currentTime = transcript.start[Number(span.dataset.index)];
+          audio.play();
+        }});
+
+        transcription.addEventListener('input', function(e) {{
+          const span = e.target.closest('span[data-index]');
+          if (span) texts[Number(span.dataset.index)] = span.innerText.trim();
+        }});
 
         function formatTime(seconds) {{
             const hours = Math.floor(seconds / 3600);
@@ -362,21 +1017,13 @@ def main():
         }}
 
         function getEditedTranscription() {{
-          let editedData = [];
-          for (var i = 0; i < spans.length; i++) {{
-            let span = spans[i];
-            let text = span.innerText.trim();
-            let start = parseFloat(span.dataset.start);
-            let end = parseFloat(span.dataset.end);
-            editedData.push({{
-              start_time: formatTime(start),
-              end_time: formatTime(end),
-              text: text
-            }});
-          }}
-          return editedData;
+          // Se arma desde los datos, no desde el DOM, para incluir los párrafos desmontados
+          return texts.map((text, i) => ({{
+            start_time: formatTime(transcript.start[i]),
+            end_time: formatTime(transcript.end[i]),
+            text: text.trim()
+          }}));
         }}
-
         function downloadTranscription() {{
             const editedData = getEditedTranscription();
             let csvContent = "start_time,end_time,text\\n";
@@ -403,11 +1050,13 @@ def main():
         # Mostrar el componente HTML
         st.components.v1.html(html_content, height=500, scrolling=False)
 
-        # Limpiar archivos temporales
-        if os.path.exists(temp_audio_path):
-            os.remove(temp_audio_path)
-        if os.path.exists("temp_dir"):
-            shutil.rmtree("temp_dir")   
+        # Exportaciones de la transcripción original generadas en el servidor
+        base_name = os.path.splitext(audio_file.name)[0]
+        csv_column, srt_column, vtt_column = st.columns(3)
+        csv_column.download_button("Descargar CSV", to_csv(df_transcription), f"{base_name}.csv", "text/csv")
+        srt_column.download_button("Descargar SRT", to_srt(df_transcription), f"{base_name}.srt", "application/x-subrip")
+        vtt_column.download_button("Descargar VTT", to_vtt(df_transcription), f"{base_name}.vtt", "text/vtt")
+        record("render", (time.perf_counter() - render_started) * 1000, segmentos=len(df_transcription))
 
 if __name__ == "__main__":
     main()
@@ -0,0 +1,489 @@
+import os
+import math
+import bisect
+import logging
+from typing import Dict, List, Optional, Tuple
+
+import ffmpeg
+import numpy as np
+
+# Límite de tamaño de archivo que acepta la API de transcripción de Groq
+GROQ_MAX_UPLOAD_BYTES = int(float(os.environ.get("GROQ_MAX_UPLOAD_MB", "25")) * 1024 * 1024)
+
+# Fracción del límite que se usa al planificar, para absorber la sobrecarga del contenedor
+UPLOAD_SAFETY_MARGIN = 0.95
+
+# Formatos que la API acepta directamente y que no necesitan recodificarse
+GROQ_UPLOAD_FORMATS = {".flac", ".mp3", ".mp4", ".mpeg", ".mpga", ".m4a", ".ogg", ".wav", ".webm"}
+
+# Perfiles de codificación de los segmentos enviados a la API.
+# Whisper remuestrea todo el audio a 16 kHz mono antes de transcribir, por lo
+# que bajar la frecuencia y los canales no quita información al modelo; lo que
+# cambia entre perfiles es cuánto comprime el códec. bit_rate es la tasa con la
+# que se codifica (o, para FLAC, una cota superior usada solo para planificar).
+ENCODING_PROFILES = {
+    "mp3_voz": {
+        "description": "MP3 16 kHz mono 32 kbps (~14 MB por hora). Artefactos leves, sin impacto apreciable en voz clara.",
+        "format": "mp3",
+        "codec": "libmp3lame",
+        "extension": ".mp3",
+        "bit_rate": 32000,
+        "sample_rate": 16000,
+        "channels": 1
+    },
+    "opus_voz": {
+        "description": "Opus 16 kHz mono 24 kbps (~11 MB por hora). El más liviano; Opus está diseñado para voz y es casi transparente a esta tasa.",
+        "format": "ogg",
+        "codec": "libopus",
+        "extension": ".ogg",
+        "bit_rate": 24000,
+        "sample_rate": 16000,
+        "channels": 1
+    },
+    "flac_16k": {
+        "description": "FLAC 16 kHz mono sin pérdida (~60-110 MB por hora). Exactamente lo que recibe el modelo, pero requiere más segmentos.",
+        "format": "flac",
+        "codec": "flac",
+        "extension": ".flac",
+        "bit_rate": 256000,
+        "sample_rate": 16000,
+        "channels": 1
+    },
+    "mp3_original": {
+        "description": "MP3 128 kbps con la frecuencia y canales originales (~57 MB por hora). Comportamiento anterior; el más pesado con pérdida.",
+        "format": "mp3",
+        "codec": "libmp3lame",
+        "extension": ".mp3",
+        "bit_rate": 128000,
+        "sample_rate": None,
+        "channels": None
+    }
+}
+
+DEFAULT_ENCODING_PROFILE = "mp3_voz"
+
+# Parámetros del cálculo de energía usado para ubicar las pausas
+ENERGY_SAMPLE_RATE = 8000
+ENERGY_FRAME_MS = 20
+ENERGY_SMOOTHING_MS = 300
+
+# Cada corte se mueve a la pausa más profunda dentro de esta ventana (hacia atrás o adelante)
+SILENCE_SEARCH_WINDOW_MS = 15000
+
+# Duración mínima del tramo de cada segmento después de mover los cortes;
+# los tramos más cortos se unen a un segmento vecino
+MIN_CHUNK_KEEP_MS = 2000
+
+# Audio que cada segmento repite del anterior para dar contexto al modelo
+CHUNK_OVERLAP_MS = 1000
+
+# Detección de voz: un frame es voz si supera el piso de ruido en este margen (dB)
+SPEECH_THRESHOLD_DB = 10
+# Solo se eliminan los silencios más largos que esto; los más cortos se conservan
+MIN_SILENCE_MS = 2000
+# Margen que se conserva alrededor de cada tramo de voz
+SPEECH_PADDING_MS = 300
+
+
+def probe_audio(audio_file: str) -> Dict:
+    """
+    Lee la duración, tasa de bits, canales y frecuencia de muestreo de un
+    archivo de audio desde los metadatos del contenedor con ffprobe, sin
+    decodificar el audio.
+
+    Args:
+        audio_file (str): Ruta al archivo de audio.
+    Returns:
+        Dict: Diccionario con duration (ms), bit_rate (bits/s), channels,
+            sample_rate, codec_name y size (bytes).
+    """
+    probe = ffmpeg.probe(audio_file)
+    audio_streams = [s for s in probe['streams'] if s.get('codec_type') == 'audio']
+    if not audio_streams:
+        raise ValueError(f"El archivo {audio_file} no contiene pistas de audio")
+    audio_stream = audio_streams[0]
+    container = probe['format']
+
+    duration = container.get('duration') or audio_stream.get('duration')
+    if duration is None:
+        raise ValueError(f"No se pudo determinar la duración de {audio_file}")
+
+    size = int(container.get('size') or os.path.getsize(audio_file))
+    bit_rate = audio_stream.get('bit_rate') or container.get('bit_rate')
+    if bit_rate is None:
+        bit_rate = size * 8 / float(duration)
+
+    return {
+        'duration': int(float(duration) * 1000),
+        'bit_rate': int(float(bit_rate)),
+        'channels': int(audio_stream.get('channels') or 0),
+        'sample_rate': int(audio_stream.get('sample_rate') or 0),
+        'codec_name': audio_stream.get('codec_name'),
+        'size': size
+    }
+
+
+def max_chunk_duration(max_bytes: int = GROQ_MAX_UPLOAD_BYTES, profile: str = DEFAULT_ENCODING_PROFILE,
+                       margin_ms: int = 0) -> int:
+    """
+    Calcula la duración máxima (ms) de un segmento codificado con el perfil
+    indicado para que quepa en el límite de bytes de la API.
+    """
+    budget = max_bytes * UPLOAD_SAFETY_MARGIN
+    bit_rate = ENCODING_PROFILES[profile]['bit_rate']
+    return max(1000, int(budget * 8 / bit_rate * 1000) - margin_ms)
+
+
+def plan_chunks(audio_file: str, audio_info: Dict, chunk_size: Optional[int] = None,
+                max_bytes: int = GROQ_MAX_UPLOAD_BYTES, profile: str = DEFAULT_ENCODING_PROFILE,
+                margin_ms: int = 0, max_chunk_ms: Optional[int] = None) -> List[Dict]:
+    """
+    Planifica los cortes del audio a partir de sus metadatos.
+
+    Si no se indica chunk_size, la duración de cada segmento se calcula para
+    que el archivo exportado quede justo bajo el límite de bytes de la API, y
+    los segmentos se reparten en partes iguales para no dejar uno final muy
+    corto. Con max_chunk_ms los segmentos además no superan esa duración,
+    aunque quepan más en el límite de bytes (segmentos cortos permiten
+    mostrar el texto antes, transcribir en paralelo y reanudar por segmento).
+    Si el archivo original ya cabe en el límite (y en max_chunk_ms), está en
+    un formato aceptado y no pesa más de lo que produciría el perfil, se
+    envía tal cual sin recodificar.
+
+    Args:
+        audio_file (str): Ruta al archivo de audio.
+        audio_info (Dict): Metadatos retornados por probe_audio.
+        chunk_size (Optional[int]): Duración fija de cada segmento en milisegundos.
+        max_bytes (int): Tamaño máximo de cada archivo enviado a la API.
+        profile (str): Perfil de codificación de ENCODING_PROFILES.
+        margin_ms (int): Duración que se reserva en cada segmento para mover los
+            cortes y agregar solapamiento sin exceder el límite de bytes.
+        max_chunk_ms (Optional[int]): Duración máxima de cada segmento cuando no se indica chunk_size.
+    Returns:
+        List[Dict]: Lista de segmentos con start_time y duration en milisegundos,
+            keep_start y keep_end (tramo del que el segmento es responsable al
+            unir los resultados) y passthrough=True si el archivo se envía sin recodificar.
+    """
+    duration = audio_info['duration']
+    budget = max_bytes * UPLOAD_SAFETY_MARGIN
+    extension = os.path.splitext(audio_file)[1].lower()
+    bit_rate = ENCODING_PROFILES[profile]['bit_rate']
+
+    if chunk_size is None:
+        encoded_size = duration / 1000 * bit_rate / 8
+        fits_duration = max_chunk_ms is None or duration <= max_chunk_ms
+        if fits_duration and audio_info['size'] <= min(budget, encoded_size) and extension in GROQ_UPLOAD_FORMATS:
+            return [{
+                'start_time': 0, 'duration': duration, 'keep_start': 0, 'keep_end': duration, 'passthrough': True
+            }]
+
+        max_chunk_size = max_chunk_duration(max_bytes, profile, margin_ms)
+        if max_chunk_ms is not None:
+            max_chunk_size = min(max_chunk_size, max_chunk_ms)
+        chunk_count = max(1, math.ceil(duration / max_chunk_size))
+        chunk_size = math.ceil(duration / chunk_count)
+
+    chunk_plan = []
+    for start in range(0, duration, chunk_size):
+        end = min(start + chunk_size, duration)
+        chunk_plan.append({
+            'start_time': start, 'duration': end - start, 'keep_start': start, 'keep_end': end, 'passthrough': False
+        })
+    return chunk_plan
+
+
+def compute_frame_energy(audio_file: str, frame_ms: int = ENERGY_FRAME_MS,
+                         sample_rate: int = ENERGY_SAMPLE_RATE) -> np.ndarray:
+    """
+    Calcula la energía (dBFS) de cada frame del audio.
+
+    ffmpeg decodifica el archivo a PCM mono de baja frecuencia y lo entrega
+    por un pipe; los bloques se procesan con NumPy a medida que llegan, por lo
+    que solo se mantiene en memoria el arreglo de energías (un valor por frame).
+
+    Args:
+        audio_file (str): Ruta al archivo de audio.
+        frame_ms (int): Duración de cada frame en milisegundos.
+        sample_rate (int): Frecuencia a la que se decodifica el audio para el análisis.
+    Returns:
+        np.ndarray: Energía de cada frame en dBFS.
+    """
+    frame_length = sample_rate * frame_ms // 1000
+    block_bytes = frame_length * 2 * 1000
+
+    process = (
+        ffmpeg.input(audio_file)
+        .output('pipe:', format='s16le', acodec='pcm_s16le', ac=1, ar=sample_rate)
+        .run_async(cmd=['ffmpeg', '-nostdin', '-loglevel', 'error'], pipe_stdout=True)
+    )
+
+    energies = []
+    try:
+        while True:
+            block = process.stdout.read(block_bytes)
+            if not block:
+                break
+            samples = np.frombuffer(block[:len(block) - len(block) % (frame_length * 2)], dtype=np.int16)
+            frames = samples.reshape(-1, frame_length).astype(np.float32) / 32768.0
+            rms = np.sqrt(np.mean(frames * frames, axis=1))
+            energies.append(20 * np.log10(np.maximum(rms, 1e-5)))
+    finally:
+        process.stdout.close()
+        process.wait()
+
+    if process.returncode != 0:
+        raise RuntimeError(f"ffmpeg falló al analizar la energía de {audio_file}")
+
+    return np.concatenate(energies) if energies else np.zeros(0, dtype=np.float32)
+
+
+def align_chunks_to_silence(chunk_plan: List[Dict], energy: np.ndarray, frame_ms: int = ENERGY_FRAME_MS,
+                            window_ms: int = SILENCE_SEARCH_WINDOW_MS,
+                            overlap_ms: int = CHUNK_OVERLAP_MS,
+                            min_keep_ms: int = MIN_CHUNK_KEEP_MS) -> List[Dict]:
+    """
+    Mueve cada corte interior del plan a la pausa más profunda cercana y
+    agrega un solapamiento al inicio de cada segmento.
+
+    La energía se suaviza con una media móvil y, para cada corte, se busca el
+    mínimo dentro de ±window_ms, sin pasar de la mitad de la distancia a los
+    cortes planificados vecinos; así dos cortes no pueden caer en la misma
+    pausa. Los tramos más cortos que min_keep_ms se unen al vecino más corto.
+    Los tramos keep_start/keep_end quedan alineados a los nuevos cortes, de
+    modo que al unir los resultados cada segmento de texto se asigna a un
+    único fragmento.
+
+    Args:
+        chunk_plan (List[Dict]): Plan retornado por plan_chunks.
+        energy (np.ndarray): Energía por frame retornada por compute_frame_energy.
+        frame_ms (int): Duración de cada frame de energía en milisegundos.
+        window_ms (int): Distancia máxima a la que se puede mover un corte.
+        overlap_ms (int): Audio del fragmento anterior que se repite al inicio de cada segmento.
+        min_keep_ms (int): Duración mínima del tramo de cada segmento.
+    Returns:
+        List[Dict]: Nuevo plan con los cortes alineados a pausas.
+    """
+    if len(chunk_plan) < 2 or len(energy) == 0:
+        return chunk_plan
+
+    smoothing = max(1, ENERGY_SMOOTHING_MS // frame_ms)
+    smoothed = np.convolve(energy, np.ones(smoothing) / smoothing, mode='same')
+
+    duration = chunk_plan[-1]['keep_end']
+    planned = [0] + [chunk['keep_start'] for chunk in chunk_plan[1:]] + [duration]
+    cuts = [0]
+    for previous, target, following in zip(planned[:-2], planned[1:-1], planned[2:]):
+        reach_back = min(window_ms, (target - previous) // 2)
+        reach_forward = min(window_ms, (following - target) // 2)
+        low = -(-max(cuts[-1] + min_keep_ms, target - reach_back) // frame_ms)
+        high = min(len(smoothed), (min(target + reach_forward, duration - min_keep_ms)) // frame_ms + 1)
+        if low >= high:
+            cuts.append(target)
+            continue
+        cuts.append(int(low + np.argmin(smoothed[low:high])) * frame_ms)
+    cuts.append(duration)
+
+    # Unir los tramos demasiado cortos (p. ej. un último segmento del plan de pocos ms) al vecino más corto
+    while len(cuts) > 2:
+        lengths = np.diff(cuts)
+        shortest = int(np.argmin(lengths))
+        if lengths[shortest] >= min_keep_ms:
+            break
+        if shortest == 0:
+            del cuts[1]
+        elif shortest == len(lengths) - 1 or lengths[shortest - 1] <= lengths[shortest + 1]:
+            del cuts[shortest]
+        else:
+            del cuts[shortest + 1]
+
+    aligned = []
+    for keep_start, keep_end in zip(cuts[:-1], cuts[1:]):
+        start = max(0, keep_start - overlap_ms)
+        aligned.append({
+            'start_time': start,
+            'duration': keep_end - start,
+            'keep_start': keep_start,
+            'keep_end': keep_end,
+            'passthrough': False
+        })
+    return aligned
+
+
+def detect_speech_regions(energy: np.ndarray, frame_ms: int = ENERGY_FRAME_MS,
+                          threshold_db: float = SPEECH_THRESHOLD_DB, min_silence_ms: int = MIN_SILENCE_MS,
+                          padding_ms: int = SPEECH_PADDING_MS) -> List[Tuple[int, int]]:
+    """
+    Detecta los tramos con voz a partir de la energía por frame.
+
+    Un frame se considera voz si su energía suavizada supera el piso de ruido
+    (percentil 2) en threshold_db. Los tramos se amplían en padding_ms y se
+    unen cuando el silencio entre ellos es menor que min_silence_ms, de modo
+    que solo se descartan pausas largas, cortes y esperas.
+
+    Args:
+        energy (np.ndarray): Energía por frame retornada por compute_frame_energy.
+        frame_ms (int): Duración de cada frame en milisegundos.
+        threshold_db (float): Margen sobre el piso de ruido para considerar un frame como voz.
+        min_silence_ms (int): Duración mínima de un silencio para eliminarlo.
+        padding_ms (int): Margen que se conserva antes y después de cada tramo de voz.
+    Returns:
+        List[Tuple[int, int]]: Tramos (inicio, fin) en milisegundos del audio original.
+    """
+    if len(energy) == 0:
+        return []
+
+    total = len(energy) * frame_ms
+    smoothing = max(1, ENERGY_SMOOTHING_MS // frame_ms)
+    smoothed = np.convolve(energy, np.ones(smoothing) / smoothing, mode='same')
+
+    # Si no hay diferencia clara entre el piso de ruido y el nivel de voz, no hay silencios que quitar
+    noise_floor = np.percentile(smoothed, 2)
+    if np.percentile(smoothed, 95) - noise_floor < threshold_db:
+        return [(0, total)]
+    is_speech = smoothed > noise_floor + threshold_db
+
+    edges = np.diff(np.concatenate(([0], is_speech.astype(np.int8), [0])))
+    starts = np.flatnonzero(edges == 1) * frame_ms - padding_ms
+    ends = np.flatnonzero(edges == -1) * frame_ms + padding_ms
+
+    regions = []
+    for start, end in zip(np.maximum(starts, 0), np.minimum(ends, total)):
+        if regions and start - regions[-1][1] < min_silence_ms:
+            regions[-1] = (regions[-1][0], int(end))
+        else:
+            regions.append((int(start), int(end)))
+    return regions
+
+
+def plan_speech_chunks(regions: List[Tuple[int, int]], max_chunk_ms: int) -> List[Dict]:
+    """
+    Agrupa los tramos de voz en segmentos cuya voz total no supera
+    max_chunk_ms. Cada segmento incluye sus tramos y el mapa de
+    desplazamientos necesario para llevar los timestamps del audio recortado
+    a la línea de tiempo original.
+
+    Args:
+        regions (List[Tuple[int, int]]): Tramos de voz retornados por detect_speech_regions.
+        max_chunk_ms (int): Duración máxima de voz por segmento.
+    Returns:
+        List[Dict]: Plan de segmentos compatible con plan_chunks, con las llaves
+            adicionales regions y offset_map.
+    """
+    # Partir los tramos que por sí solos exceden el máximo
+    pieces = []
+    for start, end in regions:
+        while end - start > max_chunk_ms:
+            pieces.append((start, start + max_chunk_ms))
+            start += max_chunk_ms
+        pieces.append((start, end))
+
+    groups = []
+    speech = 0
+    for piece in pieces:
+        length = piece[1] - piece[0]
+        if groups and speech + length <= max_chunk_ms:
+            groups[-1].append(piece)
+            speech += length
+        else:
+            groups.append([piece])
+            speech = length
+
+    chunk_plan = []
+    for group in groups:
+        start, end = group[0][0], group[-1][1]
+        chunk_plan.append({
+            'start_time': start,
+            'duration': end - start,
+            'keep_start': start,
+            'keep_end': end,
+            'passthrough': False,
+            'regions': group,
+            'offset_map': build_offset_map(group)
+        })
+    return chunk_plan
+
+
+def build_offset_map(regions: List[Tuple[int, int]]) -> List[Tuple[int, int, int]]:
+    """
+    Construye el mapa de desplazamientos de un audio formado por la
+    concatenación de los tramos indicados.
+
+    Returns:
+        List[Tuple[int, int, int]]: Entradas (inicio en el audio recortado,
+            inicio en el audio original, duración), en milisegundos.
+    """
+    offset_map = []
+    local_start = 0
+    for start, end in regions:
+        offset_map.append((local_start, start, end - start))
+        local_start += end - start
+    return offset_map
+
+
+def remap_timestamp(local_ms: int, offset_map: List[Tuple[int, int, int]], is_end: bool = False) -> int:
+    """
+    Convierte un timestamp del audio recortado a la línea de tiempo del audio original.
+
+    Un timestamp que cae justo en la unión de dos tramos se asigna al inicio
+    del tramo siguiente, salvo que is_end sea True: el fin de un segmento de
+    texto se asigna al final del tramo anterior, para que no se extienda
+    sobre el silencio eliminado.
+    """
+    local_starts = [entry[0] for entry in offset_map]
+    bisect_fn = bisect.bisect_left if is_end else bisect.bisect_right
+    index = max(0, bisect_fn(local_starts, local_ms) - 1)
+    local_start, original_start, length = offset_map[index]
+    return original_start + min(local_ms - local_start, length)
+
+
+def export_audio_chunk(audio_file: str, start_ms: int, duration_ms: int, output_path: Optional[str],
+                       profile: str = DEFAULT_ENCODING_PROFILE,
+                       regions: Optional[List[Tuple[int, int]]] = None) -> Optional[bytes]:
+    """
+    Extrae un tramo del audio directamente desde el contenedor usando la
+    búsqueda de ffmpeg (-ss antes de -i), de modo que solo se decodifica el
+    tramo solicitado y la memoria se mantiene constante sin importar la
+    duración total del archivo.
+
+    Args:
+        audio_file (str): Ruta al archivo de audio de origen.
+        start_ms (int): Inicio del tramo en milisegundos.
+        duration_ms (int): Duración del tramo en milisegundos.
+        output_path (Optional[str]): Archivo de salida. Si es None, el tramo
+            codificado se retorna en memoria sin pasar por el disco.
+        profile (str): Perfil de codificación de ENCODING_PROFILES.
+        regions (Optional[List[Tuple[int, int]]]): Si se indica, solo se conservan
+            estos tramos (ms del audio original) y se concatenan, descartando el resto.
+    Returns:
+        Optional[bytes]: Contenido codificado si output_path es None.
+    """
+    settings = ENCODING_PROFILES[profile]
+    output_args = {'vn': None, 'acodec': settings['codec'], 'format': settings['format']}
+    if settings['codec'] != 'flac':
+        output_args['audio_bitrate'] = settings['bit_rate']
+    if settings['sample_rate']:
+        output_args['ar'] = settings['sample_rate']
+    if settings['channels']:
+        output_args['ac'] = settings['channels']
+
+    stream = ffmpeg.input(audio_file, ss=start_ms / 1000, t=duration_ms / 1000).audio
+    if regions:
+        selection = '+'.join(
+            f"between(t,{(start - start_ms) / 1000:.3f},{(end - start_ms) / 1000:.3f})" for start, end in regions
+        )
+        stream = stream.filter('aselect', selection).filter('asetpts', 'N/SR/TB')
+    stream = stream.output(output_path if output_path is not None else 'pipe:', **output_args)
+
+    try:
+        out, _ = stream.run(
+            cmd=['ffmpeg', '-nostdin'],
+            capture_stdout=output_path is None,
+            capture_stderr=True,
+            overwrite_output=True
+        )
+    except ffmpeg.Error as e:
+        stderr = e.stderr.decode('utf-8', errors='replace') if e.stderr else ''
+        logging.error(f"ffmpeg falló al extraer el tramo {start_ms}-{start_ms + duration_ms} ms de {audio_file}: {stderr}")
+        raise
+
+    return out if output_path is None else None
@@ -0,0 +1,266 @@
+"""
+Servidor HTTP local que imita los endpoints de Groq (transcripción de audio y
+chat) y de Gemini (generateContent), con latencia y límites de tasa
+configurables, para medir la aplicación sin llamar a las APIs reales. Las
+respuestas de chat y de Gemini también pueden pedirse en streaming (SSE).
+"""
+import re
+import json
+import time
+import random
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Any, Dict, List, Optional, Tuple
+
+# Tasa de bits supuesta para estimar la duración del audio recibido (perfil mp3_voz)
+MOCK_AUDIO_BIT_RATE = 32000
+
+# Duración de cada segmento que devuelve la transcripción simulada
+MOCK_SEGMENT_SECONDS = 5
+
+# Fragmentos en que se divide una respuesta en streaming
+MOCK_STREAM_CHUNKS = 20
+
+# Palabras de relleno para las respuestas simuladas
+MOCK_WORDS = ("la sesión comenzó con la revisión del presupuesto y los participantes discutieron "
+              "las propuestas del ministerio sobre infraestructura educación y salud").split()
+
+GEMINI_PATH = re.compile(r"^/v1beta/models/[^/:]+:(generateContent|streamGenerateContent)$")
+
+
+class MockBehavior:
+    """
+    Comportamiento del servidor simulado.
+
+    Args:
+        latency_ms (float): Latencia base de cada respuesta.
+        jitter_ms (float): Variación aleatoria máxima que se suma a la latencia.
+        latency_per_mb_ms (float): Latencia adicional por MB recibido (subida de audio).
+        rate_limit_per_second (Optional[float]): Solicitudes por segundo permitidas; por
+            encima se responde 429 con Retry-After. None desactiva el límite.
+        error_rate (float): Fracción de solicitudes que responden 503.
+        stream_chunk_ms (float): Espera entre fragmentos de una respuesta en streaming.
+    """
+
+    def __init__(self, latency_ms: float = 200, jitter_ms: float = 100, latency_per_mb_ms: float = 50,
+                 rate_limit_per_second: Optional[float] = None, error_rate: float = 0.0,
+                 stream_chunk_ms: float = 20):
+        self.latency_ms = latency_ms
+        self.jitter_ms = jitter_ms
+        self.latency_per_mb_ms = latency_per_mb_ms
+        self.rate_limit_per_second = rate_limit_per_second
+        self.error_rate = error_rate
+        self.stream_chunk_ms = stream_chunk_ms
+
+
+class MockAPIServer(ThreadingHTTPServer):
+    """
+    Servidor con un límite de tasa tipo token bucket y contadores por ruta.
+    """
+    daemon_threads = True
+
+    def __init__(self, address: Tuple[str, int], behavior: MockBehavior):
+        super().__init__(address, MockRequestHandler)
+        self.behavior = behavior
+        self._lock = threading.Lock()
+        self._tokens = behavior.rate_limit_per_second or 0.0
+        self._last_refill = time.monotonic()
+        self.counters: Dict[str, int] = {}
+
+    @property
+    def base_url(self) -> str:
+        host, port = self.server_address[:2]
+        return f"http://{host}:{port}"
+
+    def count(self, name: str) -> None:
+        with self._lock:
+            self.counters[name] = self.counters.get(name, 0) + 1
+
+    def take_token(self) -> Optional[float]:
+        """
+        Consume un token del límite de tasa. Retorna None si la solicitud
+        puede atenderse, o los segundos que faltan para el siguiente token.
+        """
+        rate = self.behavior.rate_limit_per_second
+        if not rate:
+            return None
+        with self._lock:
+            now = time.monotonic()
+            self._tokens = min(rate, self._tokens + (now - self._last_refill) * rate)
+            self._last_refill = now
+            if self._tokens >= 1:
+                self._tokens -= 1
+                return None
+            return (1 - self._tokens) / rate
+
+
+class MockRequestHandler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"
+
+    def log_message(self, format, *args) -> None:
+        pass
+
+    def do_POST(self) -> None:
+        body = self.rfile.read(int(self.headers.get("Content-Length", 0)))
+        server: MockAPIServer = self.server
+        behavior = server.behavior
+
+        wait = server.take_token()
+        if wait is not None:
+            server.count("429")
+            self._send_json(429, {"error": {"message": "Rate limit reached", "type": "rate_limit"}},
+                            {"retry-after": f"{wait:.3f}"})
+            return
+        if behavior.error_rate and random.random() < behavior.error_rate:
+            server.count("503")
+            self._send_json(503, {"error": {"message": "Service unavailable"}})
+            return
+
+        time.sleep((behavior.latency_ms + random.uniform(0, behavior.jitter_ms)
+                    + behavior.latency_per_mb_ms * len(body) / (1024 * 1024)) / 1000)
+
+        path, _, query = self.path.partition("?")
+        if path.endswith("/audio/transcriptions"):
+            server.count("transcriptions")
+            self._send_json(200, transcription_response(len(body)))
+        elif path.endswith("/chat/completions"):
+            server.count("chat")
+            request = json.loads(body)
+            if request.get("stream"):
+                self._send_events([*chat_stream_chunks(request), "[DONE]"])
+            else:
+                self._send_json(200, chat_response(request))
+        elif GEMINI_PATH.match(path):
+            server.count("gemini")
+            request = json.loads(body)
+            if path.endswith(":streamGenerateContent"):
+                chunks = gemini_stream_chunks(request)
+                if "alt=sse" in query:
+                    self._send_events(chunks)
+                else:
+                    self._send_json(200, chunks)
+            else:
+                self._send_json(200, gemini_response(request))
+        else:
+            self._send_json(404, {"error": {"message": f"Ruta no simulada: {path}"}})
+
+    def _send_events(self, events: List[Any]) -> None:
+        """
+        Envía una respuesta Server-Sent Events, un evento cada stream_chunk_ms.
+        """
+        encoded = [f"data: {event if isinstance(event, str) else json.dumps(event)}\n\n".encode("utf-8")
+                   for event in events]
+        self.send_response(200)
+        self.send_header("Content-Type", "text/event-stream")
+        self.send_header("Content-Length", str(sum(len(event) for event in encoded)))
+        self.end_headers()
+        for event in encoded:
+            self.wfile.write(event)
+            self.wfile.flush()
+            time.sleep(self.server.behavior.stream_chunk_ms / 1000)
+
+    def _send_json(self, status: int, payload: Any, headers: Optional[Dict[str, str]] = None) -> None:
+        data = json.dumps(payload).encode("utf-8")
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(data)))
+        for name, value in (headers or {}).items():
+            self.send_header(name, value)
+        self.end_headers()
+        self.wfile.write(data)
+
+
+def filler_text(words: int) -> str:
+    return " ".join(MOCK_WORDS[i % len(MOCK_WORDS)] for i in range(words))
+
+
+def transcription_response(upload_bytes: int) -> Dict:
+    """
+    Respuesta verbose_json con un segmento cada MOCK_SEGMENT_SECONDS segundos
+    de la duración estimada del audio recibido.
+    """
+    duration = upload_bytes * 8 / MOCK_AUDIO_BIT_RATE
+    segments = []
+    start = 0.0
+    while start < duration:
+        end = min(start + MOCK_SEGMENT_SECONDS, duration)
+        segments.append({"id": len(segments), "start": start, "end": end, "text": " " + filler_text(12)})
+        start = end
+    return {"task": "transcribe", "language": "spanish", "duration": duration,
+            "text": "".join(s["text"] for s in segments), "segments": segments}
+
+
+def chat_response(request: Dict) -> Dict:
+    """
+    Respuesta de chat con tantas palabras como permita max_tokens (unas 0,75 palabras por token).
+    """
+    prompt_chars = sum(len(message.get("content") or "") for message in request.get("messages", []))
+    completion_words = max(1, int(request.get("max_tokens") or 1000) * 3 // 4)
+    return {
+        "id": "chatcmpl-mock", "object": "chat.completion", "created": int(time.time()),
+        "model": request.get("model", "mock"),
+        "choices": [{"index": 0, "finish_reason": "stop",
+                     "message": {"role": "assistant", "content": filler_text(completion_words)}}],
+        "usage": {"prompt_tokens": prompt_chars // 4, "completion_tokens": completion_words * 4 // 3,
+                  "total_tokens": prompt_chars // 4 + completion_words * 4 // 3}
+    }
+
+
+def split_words(text: str, parts: int) -> List[str]:
+    """
+    Divide un texto en hasta parts fragmentos consecutivos, cortando entre palabras.
+    """
+    words = text.split(" ")
+    size = max(1, -(-len(words) // parts))
+    return [(" " if i else "") + " ".join(words[i:i + size]) for i in range(0, len(words), size)]
+
+
+def chat_stream_chunks(request: Dict) -> List[Dict]:
+    """
+    Fragmentos chat.completion.chunk de la misma respuesta que chat_response;
+    el último trae el uso de tokens en x_groq, como la API de Groq.
+    """
+    response = chat_response(request)
+    base = {"id": response["id"], "object": "chat.completion.chunk", "created": response["created"],
+            "model": response["model"]}
+    chunks = [{**base, "choices": [{"index": 0, "delta": {"role": "assistant", "content": piece}, "finish_reason": None}]}
+              for piece in split_words(response["choices"][0]["message"]["content"], MOCK_STREAM_CHUNKS)]
+    chunks.append({**base, "choices": [{"index": 0, "delta": {}, "finish_reason": "stop"}],
+                   "x_groq": {"id": "req_mock", "usage": response["usage"]}})
+    return chunks
+
+
+def gemini_stream_chunks(request: Dict) -> List[Dict]:
+    """
+    Fragmentos de streamGenerateContent de la misma respuesta que gemini_response.
+    """
+    response = gemini_response(request)
+    pieces = split_words(response["candidates"][0]["content"]["parts"][0]["text"], MOCK_STREAM_CHUNKS)
+    chunks = [{"candidates": [{"content": {"role": "model", "parts": [{"text": piece}]}, "index": 0}]}
+              for piece in pieces]
+    chunks[-1]["candidates"][0]["finishReason"] = "STOP"
+    chunks[-1]["usageMetadata"] = response["usageMetadata"]
+    return chunks
+
+
+def gemini_response(request: Dict) -> Dict:
+    """
+    Respuesta de generateContent con tantas palabras como permita maxOutputTokens.
+    """
+    config = request.get("generationConfig") or request.get("generation_config") or {}
+    max_tokens = int(config.get("maxOutputTokens") or config.get("max_output_tokens") or 1000)
+    return {
+        "candidates": [{"content": {"role": "model", "parts": [{"text": filler_text(max(1, max_tokens * 3 // 4))}]},
+                        "finishReason": "STOP", "index": 0}],
+        "usageMetadata": {"promptTokenCount": 0, "candidatesTokenCount": max_tokens, "totalTokenCount": max_tokens}
+    }
+
+
+def start_mock_server(behavior: Optional[MockBehavior] = None, host: str = "127.0.0.1", port: int = 0) -> MockAPIServer:
+    """
+    Inicia el servidor simulado en un hilo de fondo y lo retorna.
+    Con port=0 se elige un puerto libre (ver server.base_url).
+    """
+    server = MockAPIServer((host, port), behavior or MockBehavior())
+    threading.Thread(target=server.serve_forever, name="mock_api_server", daemon=True).start()
+    return server
@@ -0,0 +1,245 @@
+"""
+Benchmarks y prueba de carga sin conexión.
+
+Levanta un servidor local que imita a Groq y Gemini (ver mock_servers.py),
+genera audio y texto sintéticos y mide el tiempo y la memoria pico de cada
+etapa de la aplicación:
+
+- create_audio_chunks y transcribe_local_audio para varias duraciones de audio
+- split_text_intelligently, edit_transcript_with_ai y procesar_transcripcion (Procesador)
+- procesar_transcripcion con Gemini (Procesador_xl)
+- una prueba de carga con varias sesiones transcribiendo a la vez
+
+Ejemplo:
+    python benchmarks/run_benchmarks.py --duraciones 1,10,60 --sesiones 8 --limite-rps 20 --salida resultados.json
+
+Los resultados en JSON permiten comparar dos versiones del código con los mismos parámetros.
+"""
+import os
+import sys
+import gc
+import json
+import time
+import logging
+import argparse
+import resource
+import importlib.util
+import tracemalloc
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Callable, Dict, List, Optional
+
+import numpy as np
+
+BENCHMARKS_DIR = os.path.dirname(os.path.abspath(__file__))
+REPO_DIR = os.path.dirname(BENCHMARKS_DIR)
+sys.path.insert(0, REPO_DIR)
+
+from mock_servers import MockBehavior, start_mock_server
+from synthetic_audio import generate_speech_like_audio, generate_transcript_text
+
+DATA_DIR = os.path.join(BENCHMARKS_DIR, ".datos")
+
+
+def measure(name: str, func: Callable[..., Any], *args, track_memory: bool = True, **kwargs) -> Dict[str, Any]:
+    """
+    Ejecuta una etapa midiendo su duración y la memoria pico de Python
+    (tracemalloc). Los errores se registran en el resultado en lugar de
+    detener el resto de los benchmarks.
+    """
+    gc.collect()
+    if track_memory:
+        tracemalloc.start()
+    started = time.perf_counter()
+    error = None
+    try:
+        func(*args, **kwargs)
+    except Exception as e:
+        error = f"{type(e).__name__}: {e}"
+        logging.error(f"Falló la etapa {name}: {error}")
+    elapsed = time.perf_counter() - started
+    peak = tracemalloc.get_traced_memory()[1] if track_memory else 0
+    if track_memory:
+        tracemalloc.stop()
+
+    result = {
+        'etapa': name,
+        'segundos': round(elapsed, 3),
+        'memoria_pico_mb': round(peak / 2 ** 20, 1) if track_memory else None,
+        'rss_max_mb': round(resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024, 1),
+        'rss_max_ffmpeg_mb': round(resource.getrusage(resource.RUSAGE_CHILDREN).ru_maxrss / 1024, 1),
+        'error': error
+    }
+    logging.info(f"{name}: {result['segundos']} s, memoria pico {result['memoria_pico_mb']} MB")
+    return result
+
+
+def load_page(name: str, file_name: str):
+    """
+    Importa una página de Streamlit como módulo (sin ejecutar su main()).
+    """
+    spec = importlib.util.spec_from_file_location(name, os.path.join(REPO_DIR, "pages", file_name))
+    module = importlib.util.module_from_spec(spec)
+    spec.loader.exec_module(module)
+    return module
+
+
+def skipped(name: str, error: Exception) -> Dict[str, Any]:
+    logging.warning(f"Se omite {name}: {error}")
+    return {'etapa': name, 'segundos': None, 'memoria_pico_mb': None, 'rss_max_mb': None,
+            'rss_max_ffmpeg_mb': None, 'error': f"omitida: {type(error).__name__}: {error}"}
+
+
+def audio_benchmarks(transcriptor, audio_files: Dict[int, str], chunk_size: Optional[int],
+                     track_memory: bool) -> List[Dict[str, Any]]:
+    from workspace import Workspace
+
+    results = []
+    for minutes, path in audio_files.items():
+        with Workspace() as workspace:
+            results.append(measure(
+                f"create_audio_chunks [{minutes} min]", transcriptor.create_audio_chunks,
+                path, chunk_size, workspace.subdir("chunks"), track_memory=track_memory
+            ))
+        results.append(measure(
+            f"transcribe_local_audio [{minutes} min]", transcriptor.transcribe_local_audio,
+            path, chunk_size, "Benchmark", track_memory=track_memory
+        ))
+    return results
+
+
+def text_benchmarks(text: str, server_url: str, track_memory: bool) -> List[Dict[str, Any]]:
+    results = []
+    try:
+        procesador = load_page("procesador", "Procesador.py")
+    except Exception as e:
+        results.append(skipped("Procesador", e))
+    else:
+        results.append(measure("split_text_intelligently", procesador.split_text_intelligently, text,
+                               track_memory=track_memory))
+        results.append(measure("edit_transcript_with_ai", procesador.edit_transcript_with_ai, text,
+                               track_memory=track_memory))
+        results.append(measure("procesar_transcripcion [Resumen]", procesador.procesar_transcripcion, text, "Resumen",
+                               track_memory=track_memory))
+
+    try:
+        procesador_xl = load_page("procesador_xl", "Procesador_xl.py")
+        # La página configura Gemini con gRPC; se redirige al servidor simulado por REST
+        procesador_xl.genai.configure(api_key="mock", transport="rest", client_options={"api_endpoint": server_url})
+    except Exception as e:
+        results.append(skipped("Procesador_xl", e))
+    else:
+        results.append(measure("procesar_transcripcion Gemini [Resumen]", procesador_xl.procesar_transcripcion,
+                               text, "Resumen", track_memory=track_memory))
+    return results
+
+
+def load_test(transcriptor, audio_file: str, sessions: int, chunk_size: Optional[int]) -> Dict[str, Any]:
+    """
+    Simula varias sesiones transcribiendo a la vez el mismo audio y reporta
+    la duración total y los percentiles de duración por sesión.
+    """
+    def session(_) -> float:
+        started = time.perf_counter()
+        transcriptor.transcribe_local_audio(audio_file, chunk_size, "Benchmark de carga")
+        return time.perf_counter() - started
+
+    started = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=sessions) as executor:
+        durations = np.array(list(executor.map(session, range(sessions))))
+    elapsed = time.perf_counter() - started
+
+    return {
+        'etapa': f"carga [{sessions} sesiones]",
+        'segundos': round(elapsed, 3),
+        'sesion_p50_s': round(float(np.percentile(durations, 50)), 3),
+        'sesion_p95_s': round(float(np.percentile(durations, 95)), 3),
+        'sesiones_por_minuto': round(sessions / elapsed * 60, 2),
+        'rss_max_mb': round(resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024, 1),
+        'error': None
+    }
+
+
+def print_table(results: List[Dict[str, Any]]) -> None:
+    print(f"\n{'Etapa':<45} {'Segundos':>10} {'Mem. pico MB':>13} {'RSS máx MB':>11}")
+    for result in results:
+        seconds = "-" if result.get('segundos') is None else f"{result['segundos']:.3f}"
+        memory = "-" if result.get('memoria_pico_mb') is None else f"{result['memoria_pico_mb']:.1f}"
+        rss = "-" if result.get('rss_max_mb') is None else f"{result['rss_max_mb']:.1f}"
+        print(f"{result['etapa']:<45} {seconds:>10} {memory:>13} {rss:>11}")
+        if result.get('error'):
+            print(f"    {result['error']}")
+        if 'sesion_p50_s' in result:
+            print(f"    p50 {result['sesion_p50_s']} s, p95 {result['sesion_p95_s']} s, "
+                  f"{result['sesiones_por_minuto']} sesiones/min")
+
+
+def parse_args(argv: Optional[List[str]] = None) -> argparse.Namespace:
+    parser = argparse.ArgumentParser(description="Benchmarks sin conexión con servidores simulados de Groq y Gemini.")
+    parser.add_argument("--duraciones", default="1,10,60", help="Duraciones del audio sintético, en minutos")
+    parser.add_argument("--duracion-segmento", type=float, default=None,
+                        help="Duración de cada segmento en minutos (por defecto se planifica por el límite de bytes)")
+    parser.add_argument("--palabras", type=int, default=20000, help="Palabras del texto sintético de las etapas de texto")
+    parser.add_argument("--sesiones", type=int, default=8, help="Sesiones simultáneas de la prueba de carga (0 la omite)")
+    parser.add_argument("--latencia-ms", type=float, default=300, help="Latencia base de las respuestas simuladas")
+    parser.add_argument("--jitter-ms", type=float, default=200, help="Variación aleatoria de la latencia")
+    parser.add_argument("--limite-rps", type=float, default=None, help="Solicitudes por segundo antes de responder 429")
+    parser.add_argument("--tasa-errores", type=float, default=0.0, help="Fracción de respuestas 503")
+    parser.add_argument("--sin-memoria", action="store_true",
+                        help="No medir memoria con tracemalloc (más rápido, solo RSS)")
+    parser.add_argument("--salida", help="Archivo JSON donde guardar los resultados")
+    return parser.parse_args(argv)
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    args = parse_args(argv)
+    logging.basicConfig(level=logging.WARNING)
+
+    server = start_mock_server(MockBehavior(
+        latency_ms=args.latencia_ms, jitter_ms=args.jitter_ms,
+        rate_limit_per_second=args.limite_rps, error_rate=args.tasa_errores
+    ))
+    # Los clientes de Groq (SDK y LangChain) y las claves se configuran antes de importar la aplicación
+    os.environ["GROQ_BASE_URL"] = server.base_url
+    os.environ["GROQ_API_BASE"] = server.base_url
+    os.environ.setdefault("GROQ_API_KEY", "mock")
+    os.environ.setdefault("GEMMINI_API_KEY", "mock")
+    # Sin caché de respuestas, para que cada ejecución mida las llamadas a los modelos
+    os.environ["AUDIO_QUAI_LLM_CACHE"] = "0"
+
+    import Transcriptor as transcriptor
+    from groq_client import client_stats
+    logging.getLogger().setLevel(logging.WARNING)
+
+    durations = [int(d) for d in args.duraciones.split(",") if d.strip()]
+    chunk_size = int(args.duracion_segmento * 60000) if args.duracion_segmento else None
+    audio_files = {
+        minutes: generate_speech_like_audio(os.path.join(DATA_DIR, f"sintetico_{minutes}min.mp3"), minutes * 60, seed=minutes)
+        for minutes in durations
+    }
+    text = generate_transcript_text(args.palabras)
+    track_memory = not args.sin_memoria
+
+    results = audio_benchmarks(transcriptor, audio_files, chunk_size, track_memory)
+    results += text_benchmarks(text, server.base_url, track_memory)
+    if args.sesiones > 0 and audio_files:
+        results.append(load_test(transcriptor, audio_files[min(audio_files)], args.sesiones, chunk_size))
+
+    summary = {
+        'fecha': time.strftime("%Y-%m-%d %H:%M:%S"),
+        'parametros': vars(args),
+        'resultados': results,
+        'servidor': dict(server.counters),
+        'cliente_groq': client_stats.snapshot()
+    }
+    print_table(results)
+    print(f"\nSolicitudes al servidor simulado: {summary['servidor']}")
+    print(f"Cliente de Groq: {summary['cliente_groq']}")
+    if args.salida:
+        with open(args.salida, "w", encoding="utf-8") as f:
+            json.dump(summary, f, ensure_ascii=False, indent=2)
+    server.shutdown()
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,80 @@
+"""
+Audio y texto sintéticos para los benchmarks: ráfagas con forma de voz
+separadas por pausas de largo variable, de modo que la detección de silencios
+y la alineación de cortes trabajen como con una grabación real.
+"""
+import os
+import wave
+import random
+
+import ffmpeg
+import numpy as np
+
+from mock_servers import filler_text
+
+SYNTHETIC_SAMPLE_RATE = 16000
+
+
+def generate_speech_like_audio(path: str, duration_seconds: float, seed: int = 0) -> str:
+    """
+    Genera un archivo de audio con ráfagas de tonos modulados (0,5 a 4 s)
+    alternadas con silencios (0,3 a 2,5 s). Si la extensión no es .wav, el
+    audio se codifica con ffmpeg. Si el archivo ya existe no se regenera.
+
+    Args:
+        path (str): Ruta del archivo a crear (.wav, .mp3, .m4a...).
+        duration_seconds (float): Duración total.
+        seed (int): Semilla del generador aleatorio.
+    Returns:
+        str: Ruta del archivo.
+    """
+    if os.path.exists(path):
+        return path
+    os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+
+    rng = random.Random(seed)
+    noise = np.random.default_rng(seed)
+    total = int(duration_seconds * SYNTHETIC_SAMPLE_RATE)
+    wav_path = path if path.endswith(".wav") else path + ".wav"
+
+    with wave.open(wav_path, "wb") as out:
+        out.setnchannels(1)
+        out.setsampwidth(2)
+        out.setframerate(SYNTHETIC_SAMPLE_RATE)
+        written = 0
+        speaking = True
+        while written < total:
+            seconds = rng.uniform(0.5, 4.0) if speaking else rng.uniform(0.3, 2.5)
+            samples = min(int(seconds * SYNTHETIC_SAMPLE_RATE), total - written)
+            if speaking:
+                t = np.arange(samples) / SYNTHETIC_SAMPLE_RATE
+                pitch = rng.uniform(100, 220)
+                envelope = 0.5 + 0.5 * np.sin(2 * np.pi * rng.uniform(3, 6) * t)
+                signal = envelope * (np.sin(2 * np.pi * pitch * t) + 0.5 * np.sin(4 * np.pi * pitch * t))
+                signal += 0.05 * noise.standard_normal(samples)
+                block = (signal / 2 * 0.5 * 32767).astype(np.int16)
+            else:
+                block = (0.002 * 32767 * noise.standard_normal(samples)).astype(np.int16)
+            out.writeframes(block.tobytes())
+            written += samples
+            speaking = not speaking
+
+    if wav_path != path:
+        ffmpeg.input(wav_path).output(path, ac=1, audio_bitrate="64k").run(
+            cmd=["ffmpeg", "-nostdin"], quiet=True, overwrite_output=True
+        )
+        os.remove(wav_path)
+    return path
+
+
+def generate_transcript_text(words: int, words_per_paragraph: int = 120) -> str:
+    """
+    Genera un texto de transcripción con párrafos separados por líneas en blanco.
+    """
+    paragraphs = []
+    remaining = words
+    while remaining > 0:
+        count = min(words_per_paragraph, remaining)
+        paragraphs.append(filler_text(count).capitalize() + ".")
+        remaining -= count
+    return "\n\n".join(paragraphs)
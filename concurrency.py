@@ -0,0 +1,110 @@
+import time
+import logging
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from typing import Any, Callable, Iterable, Iterator, List, Optional, Tuple
+
+
+def iter_completed(func: Callable[[Any], Any], items: Iterable[Any], max_workers: int) -> Iterator[Tuple[int, Any]]:
+    """
+    Aplica func a cada elemento usando un pool acotado de hilos y entrega los
+    pares (índice, resultado) a medida que cada tarea termina.
+
+    Si una tarea falla se cancelan las tareas que aún no comienzan, se espera
+    a las que están en curso y se propaga la excepción.
+
+    Args:
+        func (Callable): Función a aplicar a cada elemento.
+        items (Iterable): Elementos a procesar.
+        max_workers (int): Número máximo de tareas simultáneas.
+    Returns:
+        Iterator[Tuple[int, Any]]: Índice del elemento de entrada y su resultado.
+    """
+    items = list(items)
+    if max_workers <= 1 or len(items) <= 1:
+        for index, item in enumerate(items):
+            yield index, func(item)
+        return
+
+    executor = ThreadPoolExecutor(max_workers=min(max_workers, len(items)))
+    try:
+        futures = {executor.submit(func, item): index for index, item in enumerate(items)}
+        for future in as_completed(futures):
+            yield futures[future], future.result()
+    except BaseException:
+        executor.shutdown(wait=True, cancel_futures=True)
+        raise
+    executor.shutdown(wait=True)
+
+
+def map_ordered(func: Callable[[Any], Any], items: Iterable[Any], max_workers: int) -> List[Any]:
+    """
+    Igual que iter_completed, pero retorna la lista de resultados en el mismo
+    orden que los elementos de entrada.
+    """
+    items = list(items)
+    results = [None] * len(items)
+    for index, result in iter_completed(func, items, max_workers):
+        results[index] = result
+    return results
+
+
+def iter_ordered(func: Callable[[Any], Any], items: Iterable[Any], max_workers: int) -> Iterator[Any]:
+    """
+    Igual que iter_completed, pero entrega los resultados en el orden de los
+    elementos de entrada, cada uno apenas terminan él y todos los anteriores.
+    Permite mostrar resultados parciales sin esperar a que termine el último.
+    """
+    pending = {}
+    next_index = 0
+    for index, result in iter_completed(func, items, max_workers):
+        pending[index] = result
+        while next_index in pending:
+            yield pending.pop(next_index)
+            next_index += 1
+
+
+def iter_with_retries(func: Callable[[Any], Any], items: Iterable[Any], max_workers: int,
+                      retries: int = 2, backoff_seconds: float = 1.0,
+                      should_retry: Optional[Callable[[Exception], bool]] = None
+                      ) -> Iterator[Tuple[Any, Optional[Exception]]]:
+    """
+    Aplica func a cada elemento con un pool acotado de hilos, reintentando
+    cada elemento que falla por separado (con espera exponencial) en lugar
+    de cancelar el resto. Los resultados se entregan en el orden de entrada
+    a medida que están disponibles (ver iter_ordered).
+
+    Args:
+        func (Callable): Función a aplicar a cada elemento.
+        items (Iterable): Elementos a procesar.
+        max_workers (int): Número máximo de tareas simultáneas.
+        retries (int): Reintentos por elemento después del primer intento.
+        backoff_seconds (float): Espera antes del primer reintento; se duplica en cada uno.
+        should_retry (Optional[Callable[[Exception], bool]]): Indica si vale la pena reintentar
+            un error; si retorna False el elemento falla de inmediato. None reintenta todo error.
+    Returns:
+        Iterator[Tuple[Any, Optional[Exception]]]: Por cada elemento, (resultado, None) si
+            terminó bien o (None, error) si falló en todos los intentos.
+    """
+    def attempt(item: Any) -> Tuple[Any, Optional[Exception]]:
+        for retry in range(retries + 1):
+            try:
+                return func(item), None
+            except Exception as e:
+                if retry == retries or (should_retry is not None and not should_retry(e)):
+                    return None, e
+                delay = backoff_seconds * 2 ** retry
+                logging.warning(f"Falló un elemento ({e}); reintento {retry + 1}/{retries} en {delay:.1f} s")
+                time.sleep(delay)
+
+    return iter_ordered(attempt, items, max_workers)
+
+
+def map_with_retries(func: Callable[[Any], Any], items: Iterable[Any], max_workers: int,
+                     retries: int = 2, backoff_seconds: float = 1.0,
+                     should_retry: Optional[Callable[[Exception], bool]] = None
+                     ) -> List[Tuple[Any, Optional[Exception]]]:
+    """
+    Igual que iter_with_retries, pero retorna la lista completa de pares
+    (resultado, error) en el orden de entrada.
+    """
+    return list(iter_with_retries(func, items, max_workers, retries, backoff_seconds, should_retry))
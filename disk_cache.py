@@ -0,0 +1,120 @@
+import os
+import json
+import time
+import sqlite3
+import hashlib
+import logging
+import threading
+from contextlib import contextmanager
+from typing import Any, Optional
+
+
+class DiskCache:
+    """
+    Caché persistente en disco respaldada por SQLite, con límite de tamaño y
+    desalojo LRU (se eliminan primero las entradas usadas hace más tiempo).
+
+    Los valores se guardan serializados como JSON. Cualquier error de la caché
+    se registra y se trata como un fallo de búsqueda: la caché nunca debe
+    interrumpir el flujo principal.
+    """
+
+    def __init__(self, path: str, max_bytes: int = 200 * 1024 * 1024):
+        self.path = path
+        self.max_bytes = max_bytes
+        self._lock = threading.Lock()
+
+        directory = os.path.dirname(path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+
+        with self._connect() as conn:
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute(
+                "CREATE TABLE IF NOT EXISTS cache ("
+                "key TEXT PRIMARY KEY, "
+                "value TEXT NOT NULL, "
+                "size INTEGER NOT NULL, "
+                "accessed REAL NOT NULL)"
+            )
+            conn.execute("CREATE INDEX IF NOT EXISTS cache_accessed ON cache (accessed)")
+
+    @staticmethod
+    def make_key(*parts: Any) -> str:
+        """
+        Construye una clave estable (SHA-256) a partir de cualquier combinación
+        de valores serializables como JSON.
+        """
+        payload = json.dumps(parts, ensure_ascii=False, sort_keys=True, default=str)
+        return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+    @contextmanager
+    def _connect(self):
+        conn = sqlite3.connect(self.path, timeout=30)
+        try:
+            yield conn
+            conn.commit()
+        finally:
+            conn.close()
+
+    def get(self, key: str) -> Optional[Any]:
+        """
+        Retorna el valor asociado a la clave o None si no existe.
+        Actualiza la marca de último acceso para el desalojo LRU.
+        """
+        try:
+            with self._lock, self._connect() as conn:
+                row = conn.execute("SELECT value FROM cache WHERE key = ?", (key,)).fetchone()
+                if row is None:
+                    return None
+                conn.execute("UPDATE cache SET accessed = ? WHERE key = ?", (time.time(), key))
+            return json.loads(row[0])
+        except Exception as e:
+            logging.error(f"Error al leer la caché {self.path}: {e}")
+            return None
+
+    def set(self, key: str, value: Any) -> None:
+        """
+        Guarda un valor en la caché y desaloja las entradas menos usadas
+        hasta respetar el tamaño máximo.
+        """
+        try:
+            data = json.dumps(value, ensure_ascii=False)
+            size = len(data.encode("utf-8"))
+            if size > self.max_bytes:
+                logging.warning(f"Entrada de {size} bytes excede el tamaño máximo de la caché, no se guarda")
+                return
+
+            with self._lock, self._connect() as conn:
+                conn.execute(
+                    "INSERT OR REPLACE INTO cache (key, value, size, accessed) VALUES (?, ?, ?, ?)",
+                    (key, data, size, time.time())
+                )
+                self._evict(conn)
+        except Exception as e:
+            logging.error(f"Error al escribir en la caché {self.path}: {e}")
+
+    def delete(self, key: str) -> None:
+        """
+        Elimina una entrada de la caché si existe.
+        """
+        try:
+            with self._lock, self._connect() as conn:
+                conn.execute("DELETE FROM cache WHERE key = ?", (key,))
+        except Exception as e:
+            logging.error(f"Error al eliminar de la caché {self.path}: {e}")
+
+    def _evict(self, conn: sqlite3.Connection) -> None:
+        total = conn.execute("SELECT COALESCE(SUM(size), 0) FROM cache").fetchone()[0]
+        if total <= self.max_bytes:
+            return
+
+        expired = []
+        for key, size in conn.execute("SELECT key, size FROM cache ORDER BY accessed ASC"):
+            if total <= self.max_bytes:
+                break
+            expired.append((key,))
+            total -= size
+
+        conn.executemany("DELETE FROM cache WHERE key = ?", expired)
+        logging.info(f"Caché {self.path}: {len(expired)} entradas desalojadas")
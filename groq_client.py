@@ -0,0 +1,155 @@
+import os
+import time
+import random
+import logging
+import threading
+from email.utils import parsedate_to_datetime
+from typing import Any, Callable, Dict, Optional
+
+import httpx
+from groq import Groq, APIConnectionError, APIStatusError
+
+# Conexiones HTTP que se mantienen abiertas y se reutilizan entre llamadas
+GROQ_MAX_CONNECTIONS = int(os.environ.get("GROQ_MAX_CONNECTIONS", "20"))
+GROQ_KEEPALIVE_SECONDS = 60
+GROQ_TIMEOUT_SECONDS = 600
+
+# Reintentos ante errores transitorios (429, 5xx, fallas de conexión)
+GROQ_MAX_RETRIES = int(os.environ.get("GROQ_MAX_RETRIES", "5"))
+GROQ_BACKOFF_BASE_SECONDS = 1.0
+GROQ_BACKOFF_MAX_SECONDS = 60.0
+
+RETRYABLE_STATUS_CODES = {408, 409, 429}
+
+_clients: Dict[str, Groq] = {}
+_clients_lock = threading.Lock()
+
+
+class ClientStats:
+    """
+    Contadores de llamadas, reintentos, fallas y latencia del cliente de Groq,
+    compartidos por todos los hilos del proceso.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.reset()
+
+    def reset(self) -> None:
+        with self._lock:
+            self.calls = 0
+            self.retries = 0
+            self.failures = 0
+            self.total_latency = 0.0
+            self.max_latency = 0.0
+
+    def record_attempt(self, latency: float, retried: bool = False, failed: bool = False) -> None:
+        with self._lock:
+            self.calls += 1
+            self.retries += int(retried)
+            self.failures += int(failed)
+            self.total_latency += latency
+            self.max_latency = max(self.max_latency, latency)
+
+    def snapshot(self) -> Dict[str, float]:
+        with self._lock:
+            return {
+                'calls': self.calls,
+                'retries': self.retries,
+                'failures': self.failures,
+                'avg_latency': self.total_latency / self.calls if self.calls else 0.0,
+                'max_latency': self.max_latency
+            }
+
+
+client_stats = ClientStats()
+
+
+def get_groq_client(api_key: str) -> Groq:
+    """
+    Retorna el cliente de Groq compartido por todo el proceso para la clave
+    indicada. El cliente usa un pool de conexiones HTTP con keep-alive, de
+    modo que las llamadas sucesivas no repiten el handshake TCP/TLS. Los
+    reintentos propios del SDK se desactivan porque se manejan en
+    call_with_retries.
+    """
+    with _clients_lock:
+        client = _clients.get(api_key)
+        if client is None:
+            http_client = httpx.Client(
+                limits=httpx.Limits(
+                    max_connections=GROQ_MAX_CONNECTIONS,
+                    max_keepalive_connections=GROQ_MAX_CONNECTIONS,
+                    keepalive_expiry=GROQ_KEEPALIVE_SECONDS
+                ),
+                timeout=httpx.Timeout(GROQ_TIMEOUT_SECONDS, connect=10.0)
+            )
+            client = Groq(api_key=api_key, max_retries=0, http_client=http_client)
+            _clients[api_key] = client
+        return client
+
+
+def is_retryable(error: Exception) -> bool:
+    """
+    Indica si un error de la API es transitorio y vale la pena reintentar.
+    """
+    if isinstance(error, APIStatusError):
+        return error.status_code in RETRYABLE_STATUS_CODES or error.status_code >= 500
+    return isinstance(error, APIConnectionError)
+
+
+def retry_delay(error: Exception, attempt: int) -> float:
+    """
+    Calcula la espera antes del siguiente intento. Si la respuesta trae
+    Retry-After (en segundos o como fecha HTTP) se respeta; si no, se usa un
+    backoff exponencial con jitter completo.
+    """
+    response: Optional[httpx.Response] = getattr(error, 'response', None)
+    if response is not None:
+        retry_after_ms = response.headers.get('retry-after-ms')
+        retry_after = response.headers.get('retry-after')
+        try:
+            if retry_after_ms is not None:
+                return min(float(retry_after_ms) / 1000, GROQ_BACKOFF_MAX_SECONDS)
+            if retry_after is not None:
+                try:
+                    delay = float(retry_after)
+                except ValueError:
+                    delay = parsedate_to_datetime(retry_after).timestamp() - time.time()
+                return min(max(delay, 0.0), GROQ_BACKOFF_MAX_SECONDS)
+        except (TypeError, ValueError):
+            pass
+
+    return random.uniform(0, min(GROQ_BACKOFF_MAX_SECONDS, GROQ_BACKOFF_BASE_SECONDS * 2 ** attempt))
+
+
+def call_with_retries(func: Callable[..., Any], *args, max_retries: int = GROQ_MAX_RETRIES, **kwargs) -> Any:
+    """
+    Ejecuta una llamada a la API de Groq reintentando los errores transitorios
+    y registrando la latencia de cada intento en client_stats.
+
+    Args:
+        func (Callable): Método del cliente a llamar (por ejemplo client.audio.transcriptions.create).
+        max_retries (int): Número máximo de reintentos.
+    Returns:
+        Any: Respuesta de la API.
+    """
+    attempt = 0
+    while True:
+        started = time.monotonic()
+        try:
+            result = func(*args, **kwargs)
+        except Exception as e:
+            latency = time.monotonic() - started
+            if attempt >= max_retries or not is_retryable(e):
+                client_stats.record_attempt(latency, failed=True)
+                raise
+            delay = retry_delay(e, attempt)
+            client_stats.record_attempt(latency, retried=True)
+            attempt += 1
+            logging.warning(f"Error transitorio de Groq ({e}); reintento {attempt}/{max_retries} en {delay:.1f} s")
+            time.sleep(delay)
+            continue
+
+        client_stats.record_attempt(time.monotonic() - started)
+        return result
@@ -0,0 +1,206 @@
+import os
+import time
+import uuid
+import logging
+import threading
+import traceback
+from collections import OrderedDict, deque
+from typing import Any, Callable, Deque, Dict, List, Optional
+
+# Trabajos de transcripción que se ejecutan a la vez en todo el servidor
+JOB_WORKERS = int(os.environ.get("AUDIO_QUAI_JOB_WORKERS", "2"))
+
+# Tiempo que se conservan los trabajos terminados para que la interfaz lea su resultado
+JOB_RETENTION_SECONDS = 3600
+
+PENDING = "pendiente"
+RUNNING = "en_curso"
+DONE = "terminado"
+FAILED = "error"
+
+
+class Job:
+    """
+    Trabajo encolado. La función del trabajo recibe la instancia y reporta su
+    avance con update(); la interfaz lee el estado con snapshot().
+    """
+
+    def __init__(self, user_id: str, key: Optional[str], func: Callable[..., Any], args: tuple, kwargs: Dict):
+        self.id = uuid.uuid4().hex
+        self.user_id = user_id
+        self.key = key
+        self.func = func
+        self.args = args
+        self.kwargs = kwargs
+        self.status = PENDING
+        self.completed = 0
+        self.total = 0
+        self.partial: List[Any] = []
+        self.result: Any = None
+        self.error: Optional[str] = None
+        self.created_at = time.time()
+        self.started_at: Optional[float] = None
+        self.finished_at: Optional[float] = None
+        self._lock = threading.Lock()
+
+    def update(self, completed: int, total: int, partial: Optional[List[Any]] = None) -> None:
+        """
+        Registra el avance del trabajo (unidades terminadas, total y resultado parcial).
+        """
+        with self._lock:
+            self.completed = completed
+            self.total = total
+            if partial is not None:
+                self.partial = partial
+
+    def snapshot(self) -> Dict[str, Any]:
+        """
+        Retorna una copia consistente del estado del trabajo.
+        """
+        with self._lock:
+            return {
+                'id': self.id,
+                'status': self.status,
+                'completed': self.completed,
+                'total': self.total,
+                'partial': self.partial,
+                'result': self.result,
+                'error': self.error,
+                'created_at': self.created_at,
+                'started_at': self.started_at,
+                'finished_at': self.finished_at
+            }
+
+    def _set_status(self, status: str, result: Any = None, error: Optional[str] = None) -> None:
+        with self._lock:
+            self.status = status
+            if status == RUNNING:
+                self.started_at = time.time()
+            elif status in (DONE, FAILED):
+                self.finished_at = time.time()
+                self.result = result
+                self.error = error
+                # Los argumentos (por ejemplo el audio subido) ya no se necesitan
+                self.args, self.kwargs = (), {}
+
+
+class JobQueue:
+    """
+    Cola local de trabajos con un pool acotado de hilos compartido por todas
+    las sesiones. Los trabajos se ejecutan fuera del hilo del script de
+    Streamlit, así que siguen corriendo aunque el usuario cierre la pestaña o
+    la página se vuelva a ejecutar.
+
+    La planificación es justa por usuario: cada usuario tiene su propia fila y
+    los hilos las atienden por turnos (round-robin), de modo que quien encola
+    muchos trabajos no deja esperando a los demás.
+    """
+
+    def __init__(self, max_workers: int = JOB_WORKERS):
+        self._condition = threading.Condition()
+        self._queues: "OrderedDict[str, Deque[Job]]" = OrderedDict()
+        self._jobs: Dict[str, Job] = {}
+        self._workers = [
+            threading.Thread(target=self._worker, name=f"audio_quai_job_{i}", daemon=True)
+            for i in range(max(1, max_workers))
+        ]
+        for worker in self._workers:
+            worker.start()
+
+    def submit(self, user_id: str, func: Callable[..., Any], *args, key: Optional[str] = None, **kwargs) -> Job:
+        """
+        Encola un trabajo. Si se indica key y ya hay un trabajo pendiente o en
+        curso con la misma clave, se retorna ese trabajo en lugar de duplicarlo.
+
+        Args:
+            user_id (str): Identificador del usuario, usado para repartir los turnos.
+            func (Callable): Función a ejecutar; recibe el Job seguido de args y kwargs.
+            key (Optional[str]): Clave que identifica trabajos equivalentes.
+        Returns:
+            Job: Trabajo encolado (o el equivalente que ya existía).
+        """
+        with self._condition:
+            self._prune()
+            if key is not None:
+                for job in self._jobs.values():
+                    if job.key == key and job.status in (PENDING, RUNNING):
+                        return job
+
+            job = Job(user_id, key, func, args, kwargs)
+            self._jobs[job.id] = job
+            self._queues.setdefault(user_id, deque()).append(job)
+            self._condition.notify()
+            return job
+
+    def get(self, job_id: str) -> Optional[Job]:
+        """
+        Retorna el trabajo con el identificador indicado, si todavía se conserva.
+        """
+        with self._condition:
+            return self._jobs.get(job_id)
+
+    def position(self, job: Job) -> int:
+        """
+        Retorna cuántos trabajos se ejecutarán antes que el indicado (0 si ya
+        está en curso o terminó), considerando los turnos por usuario.
+        """
+        with self._condition:
+            if job.status != PENDING:
+                return 0
+            # Se simulan las rondas de turnos sobre una copia de las filas
+            queues = [deque(queue) for queue in self._queues.values()]
+            position = 0
+            while queues:
+                for queue in queues:
+                    if queue.popleft() is job:
+                        return position
+                    position += 1
+                queues = [queue for queue in queues if queue]
+            return position
+
+    def stats(self) -> Dict[str, int]:
+        """
+        Retorna cuántos trabajos hay en cada estado.
+        """
+        with self._condition:
+            counts = {PENDING: 0, RUNNING: 0, DONE: 0, FAILED: 0}
+            for job in self._jobs.values():
+                counts[job.status] += 1
+            return counts
+
+    def _next_job(self) -> Job:
+        """
+        Espera y retorna el siguiente trabajo, tomando uno del primer usuario
+        en turno y pasando a ese usuario al final de la ronda.
+        """
+        with self._condition:
+            while not self._queues:
+                self._condition.wait()
+            user_id, queue = next(iter(self._queues.items()))
+            job = queue.popleft()
+            del self._queues[user_id]
+            if queue:
+                self._queues[user_id] = queue
+            job._set_status(RUNNING)
+            return job
+
+    def _worker(self) -> None:
+        while True:
+            job = self._next_job()
+            try:
+                result = job.func(job, *job.args, **job.kwargs)
+            except Exception as e:
+                logging.error(f"Falló el trabajo {job.id} del usuario {job.user_id}: {e}")
+                logging.error(traceback.format_exc())
+                job._set_status(FAILED, error=str(e))
+            else:
+                job._set_status(DONE, result=result)
+
+    def _prune(self) -> None:
+        """
+        Olvida los trabajos terminados hace más de JOB_RETENTION_SECONDS.
+        """
+        limit = time.time() - JOB_RETENTION_SECONDS
+        for job_id in [job_id for job_id, job in self._jobs.items()
+                       if job.finished_at is not None and job.finished_at < limit]:
+            del self._jobs[job_id]
@@ -0,0 +1,96 @@
+import os
+import time
+from typing import Any, Callable, Dict, Iterator, Optional, Sequence
+
+import streamlit as st
+
+from disk_cache import DiskCache
+
+# Caché de respuestas de los modelos de lenguaje ("0" la desactiva). Las
+# llamadas usan temperature=0, así que repetir la misma solicitud (volver a
+# procesar o cambiar de tipo de reporte sobre el mismo texto) no cambia el
+# resultado y puede leerse del disco sin gastar cuota.
+LLM_CACHE = os.environ.get("AUDIO_QUAI_LLM_CACHE", "1") == "1"
+LLM_CACHE_DIR = os.environ.get("AUDIO_QUAI_CACHE_DIR", ".cache")
+LLM_CACHE_MAX_BYTES = 100 * 1024 * 1024
+
+
+@st.cache_resource
+def get_llm_cache() -> Optional[DiskCache]:
+    """
+    Retorna la caché de respuestas compartida por todas las sesiones, o None si está desactivada.
+    """
+    if not LLM_CACHE:
+        return None
+    return DiskCache(os.path.join(LLM_CACHE_DIR, "llm.sqlite"), LLM_CACHE_MAX_BYTES)
+
+
+def cached_llm_call(key_parts: Sequence[Any], call: Callable[[], str],
+                    metric: Optional[Dict[str, Any]] = None) -> str:
+    """
+    Retorna la respuesta guardada para key_parts o ejecuta call y guarda su
+    resultado. La clave debe incluir todo lo que determina la respuesta:
+    proveedor, modelo, prompt completo (plantilla y fragmento) y parámetros
+    de generación. Solo se guardan respuestas no vacías; los errores se
+    propagan sin guardarse.
+
+    Args:
+        key_parts (Sequence[Any]): Valores serializables como JSON que identifican la solicitud.
+        call (Callable[[], str]): Llamada al modelo que retorna el texto de la respuesta.
+        metric (Optional[Dict[str, Any]]): Datos de la métrica en curso (ver metrics.timed),
+            donde se indica si la respuesta vino de la caché.
+    Returns:
+        str: Texto de la respuesta.
+    """
+    cache = get_llm_cache()
+    key = DiskCache.make_key("llm", *key_parts)
+    if cache is not None:
+        cached = cache.get(key)
+        if cached is not None:
+            if metric is not None:
+                metric['cache'] = True
+            return cached
+
+    result = call()
+    if metric is not None:
+        metric['cache'] = False
+    if cache is not None and result:
+        cache.set(key, result)
+    return result
+
+
+def cached_llm_stream(key_parts: Sequence[Any], stream: Callable[[], Iterator[str]],
+                      metric: Optional[Dict[str, Any]] = None) -> Iterator[str]:
+    """
+    Versión de cached_llm_call para respuestas en streaming: si la respuesta
+    está en la caché se entrega completa de una vez; si no, se entregan los
+    fragmentos de texto a medida que llegan y la respuesta se guarda solo
+    cuando el streaming termina. Las claves son las mismas que las de
+    cached_llm_call, así que ambas variantes comparten la caché. En metric se
+    registra además el tiempo hasta el primer fragmento (primer_token_ms).
+    """
+    cache = get_llm_cache()
+    key = DiskCache.make_key("llm", *key_parts)
+    if cache is not None:
+        cached = cache.get(key)
+        if cached is not None:
+            if metric is not None:
+                metric['cache'] = True
+            yield cached
+            return
+
+    started = time.perf_counter()
+    pieces = []
+    for piece in stream():
+        if not piece:
+            continue
+        if not pieces and metric is not None:
+            metric['primer_token_ms'] = round((time.perf_counter() - started) * 1000, 1)
+        pieces.append(piece)
+        yield piece
+
+    result = "".join(pieces)
+    if metric is not None:
+        metric['cache'] = False
+    if cache is not None and result:
+        cache.set(key, result)
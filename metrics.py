@@ -0,0 +1,136 @@
+import os
+import json
+import time
+import logging
+import threading
+from collections import deque
+from contextlib import contextmanager
+from typing import Any, Deque, Dict, Iterator, List, Optional
+
+import numpy as np
+import pandas as pd
+import streamlit as st
+
+# Registro de métricas en formato JSONL (un evento por línea); vacío lo desactiva
+METRICS_LOG_PATH = os.environ.get(
+    "AUDIO_QUAI_METRICS_LOG", os.path.join(os.environ.get("AUDIO_QUAI_CACHE_DIR", ".cache"), "metricas.jsonl")
+)
+
+# Tamaño máximo del registro; al superarlo se renombra a <archivo>.1 (se
+# conserva un solo respaldo) y se empieza uno nuevo
+METRICS_LOG_MAX_BYTES = int(float(os.environ.get("AUDIO_QUAI_METRICS_LOG_MAX_MB", "10")) * 1024 * 1024)
+
+# Eventos recientes que se conservan en memoria para el panel de depuración
+METRICS_BUFFER_SIZE = 5000
+
+_events: Deque[Dict[str, Any]] = deque(maxlen=METRICS_BUFFER_SIZE)
+_lock = threading.Lock()
+
+
+def record(stage: str, duration_ms: Optional[float] = None, **fields) -> Dict[str, Any]:
+    """
+    Registra un evento de métrica en memoria y en el archivo JSONL, que rota
+    al llegar a METRICS_LOG_MAX_BYTES.
+
+    Args:
+        stage (str): Etapa medida (por ejemplo api_transcripcion).
+        duration_ms (Optional[float]): Duración de la etapa en milisegundos.
+        **fields: Datos adicionales del evento (bytes, tokens, segmento, error...).
+    Returns:
+        Dict[str, Any]: Evento registrado.
+    """
+    event = {'ts': round(time.time(), 3), 'stage': stage}
+    if duration_ms is not None:
+        event['duration_ms'] = round(duration_ms, 1)
+    event.update(fields)
+
+    with _lock:
+        _events.append(event)
+        if METRICS_LOG_PATH:
+            try:
+                directory = os.path.dirname(METRICS_LOG_PATH)
+                if directory:
+                    os.makedirs(directory, exist_ok=True)
+                if os.path.exists(METRICS_LOG_PATH) and os.path.getsize(METRICS_LOG_PATH) >= METRICS_LOG_MAX_BYTES:
+                    os.replace(METRICS_LOG_PATH, METRICS_LOG_PATH + ".1")
+                with open(METRICS_LOG_PATH, "a", encoding="utf-8") as f:
+                    f.write(json.dumps(event, ensure_ascii=False, default=str) + "\n")
+            except OSError as e:
+                logging.warning(f"No se pudo escribir el registro de métricas {METRICS_LOG_PATH}: {e}")
+    return event
+
+
+@contextmanager
+def timed(stage: str, **fields) -> Iterator[Dict[str, Any]]:
+    """
+    Mide la duración de un bloque y la registra con record al salir. Retorna
+    un diccionario en el que el bloque puede agregar datos conocidos al final
+    (por ejemplo los bytes exportados o los tokens usados). Si el bloque
+    falla, el evento incluye el error y la excepción se propaga.
+    """
+    started = time.perf_counter()
+    try:
+        yield fields
+    except Exception as e:
+        fields['error'] = f"{type(e).__name__}: {e}"
+        raise
+    finally:
+        record(stage, (time.perf_counter() - started) * 1000, **fields)
+
+
+def token_usage(response: Any) -> Dict[str, int]:
+    """
+    Extrae los tokens de entrada y salida de una respuesta de Groq (usage) o
+    de Gemini (usage_metadata), si la respuesta los informa.
+    """
+    usage = getattr(response, 'usage', None)
+    if usage is not None:
+        return {'tokens_entrada': usage.prompt_tokens, 'tokens_salida': usage.completion_tokens}
+    usage = getattr(response, 'usage_metadata', None)
+    if usage is not None:
+        return {'tokens_entrada': usage.prompt_token_count, 'tokens_salida': usage.candidates_token_count}
+    return {}
+
+
+def recent(limit: int = 200) -> List[Dict[str, Any]]:
+    """
+    Retorna los últimos eventos registrados en este proceso, del más reciente al más antiguo.
+    """
+    with _lock:
+        events = list(_events)[-limit:]
+    return events[::-1]
+
+
+def summary() -> pd.DataFrame:
+    """
+    Resume los eventos en memoria por etapa: cantidad, errores y duración
+    total, promedio, p95 y máxima (en milisegundos).
+    """
+    with _lock:
+        events = list(_events)
+    rows = []
+    for stage in sorted({event['stage'] for event in events}):
+        stage_events = [event for event in events if event['stage'] == stage]
+        durations = np.array([event['duration_ms'] for event in stage_events if 'duration_ms' in event])
+        rows.append({
+            'etapa': stage,
+            'eventos': len(stage_events),
+            'errores': sum('error' in event for event in stage_events),
+            'total_ms': round(float(durations.sum()), 1) if durations.size else None,
+            'promedio_ms': round(float(durations.mean()), 1) if durations.size else None,
+            'p95_ms': round(float(np.percentile(durations, 95)), 1) if durations.size else None,
+            'max_ms': round(float(durations.max()), 1) if durations.size else None
+        })
+    return pd.DataFrame(rows, columns=['etapa', 'eventos', 'errores', 'total_ms', 'promedio_ms', 'p95_ms', 'max_ms'])
+
+
+def show_debug_panel() -> None:
+    """
+    Muestra en la página un panel plegable con el resumen por etapa y los
+    eventos recientes de este proceso.
+    """
+    with st.expander("Métricas de rendimiento"):
+        st.dataframe(summary(), hide_index=True)
+        st.dataframe(pd.DataFrame(recent()), hide_index=True)
+        if METRICS_LOG_PATH:
+            st.caption(f"Registro completo en {METRICS_LOG_PATH}")
@@ -1,17 +1,24 @@
 import streamlit as st
 import pandas as pd
-from groq import Groq
 import os
-from langchain.text_splitter import RecursiveCharacterTextSplitter
+import logging
 from langchain.chains import LLMChain
 from langchain_groq import ChatGroq
 from langchain.prompts import ChatPromptTemplate
+from groq import APIConnectionError, APIStatusError
+
+from groq_client import get_groq_client, call_with_retries
+from concurrency import iter_with_retries, map_with_retries
+from token_count import count_tokens, pack_chunks
+from settings import get_secret
+from metrics import timed, token_usage, show_debug_panel
+from llm_cache import cached_llm_call, cached_llm_stream
 
 # Configuración de la clave API de Groq
-GROQ_API_KEY = st.secrets["GROQ_API_KEY"]
+GROQ_API_KEY = get_secret("GROQ_API_KEY")
 
-# Inicializar cliente de Groq
-client = Groq(api_key = GROQ_API_KEY)
+# Cliente de Groq compartido por todo el proceso (se reutiliza entre ejecuciones de la página)
+client = get_groq_client(GROQ_API_KEY)
 
 #MODEL = "llama-3.1-8b-instant"
 MODEL = "llama-3.3-70b-Versatile"
@@ -20,26 +27,23 @@ MODEL = "llama-3.3-70b-Versatile"
 # Ajustar el tamaño máximo de tokens para evitar llegar al límite de la API
 MAX_TOKENS = 3000
 
+# Tokens por fragmento en la edición profesional (la respuesta tiene un largo similar)
+EDIT_CHUNK_TOKENS = 2000
 
-def split_transcript(transcript, chunk_size=3000, overlap=100):
-    """
-    Divide el texto en fragmentos de tamaño específico para la edición profesional.
-    """
-    text_splitter = RecursiveCharacterTextSplitter(
-        chunk_size=chunk_size,
-        chunk_overlap=overlap,
-        length_function=len
-    )
-    return text_splitter.split_text(transcript)
+# Fragmentos que se envían al modelo a la vez y reintentos de cada fragmento que falla
+LLM_MAX_CONCURRENCY = int(os.environ.get("LLM_MAX_CONCURRENCY", "4"))
+LLM_CHUNK_RETRIES = 2
 
+# Resumen jerárquico: tokens por fragmento del texto original, resúmenes
+# parciales que se combinan en cada llamada del siguiente nivel y tokens
+# máximos del texto que se envía al prompt final (Minuta, Resumen, Oportunidades)
+SUMMARY_CHUNK_TOKENS = 2500
+SUMMARY_FAN_OUT = int(os.environ.get("SUMMARY_FAN_OUT", "4"))
+FINAL_PROMPT_TOKENS = 3000
 
-def create_edit_chain():
-    """
-    Configura la cadena de edición utilizando el modelo GPT-4 para edición profesional.
-    """
-    llm = ChatGroq(groq_api_key=GROQ_API_KEY, model_name=MODEL, temperature=0)
 
-    template = """
+# Plantilla de la edición profesional (también forma parte de la clave de la caché de respuestas)
+EDIT_TEMPLATE = """
     Eres un editor experto encargado de transformar transcripciones en texto pulido y profesional para un reporte.
     Tu tarea es editar la siguiente transcripción y devolver un texto editado que sea claro, coherente y adecuado para su comprensión.
     En el texto se menciona organismos públicos, privados, académicos por lo que debes identificar palabras que estén mal transcritas y
@@ -66,23 +70,69 @@ def create_edit_chain():
     Texto editado:
     """
 
-    prompt = ChatPromptTemplate.from_template(template)
+
+def reintentar_fragmento(error):
+    """
+    Indica si un fragmento fallido vale la pena reintentarlo completo. Los
+    errores de la API ya se reintentaron en call_with_retries (o en el
+    cliente de LangChain) si eran transitorios, y los demás (400 por un
+    contexto demasiado largo, 401...) no se arreglan reintentando; el
+    reintento por fragmento queda para el resto de los errores.
+    """
+    return not isinstance(error, (APIStatusError, APIConnectionError))
+
+
+def split_transcript(transcript, max_tokens=EDIT_CHUNK_TOKENS):
+    """
+    Divide el texto en fragmentos de hasta max_tokens tokens para la edición
+    profesional, cortando en límites de oración.
+    """
+    return pack_chunks(transcript, max_tokens)
+
+
+def create_edit_chain():
+    """
+    Configura la cadena de edición utilizando el modelo GPT-4 para edición profesional.
+    """
+    llm = ChatGroq(groq_api_key=GROQ_API_KEY, model_name=MODEL, temperature=0)
+    prompt = ChatPromptTemplate.from_template(EDIT_TEMPLATE)
     return LLMChain(llm=llm, prompt=prompt)
 
 
-def edit_transcript_with_ai(transcript):
+def iter_edicion(transcript):
     """
     Edita la transcripción utilizando la cadena de edición para edición profesional.
+    Los fragmentos se editan en paralelo (hasta LLM_MAX_CONCURRENCY a la vez) y
+    se entregan en su orden original apenas están listos, para mostrarlos sin
+    esperar al último. Si un fragmento falla en todos sus intentos se conserva
+    sin editar y se avisa, en lugar de perder todo el trabajo.
     """
     chunks = split_transcript(transcript)
     edit_chain = create_edit_chain()
 
-    edited_chunks = []
-    for chunk in chunks:
-        result = edit_chain.run(text=chunk)
-        edited_chunks.append(result)
+    def edit_chunk(indexed_chunk):
+        i, chunk = indexed_chunk
+        with timed("llm_edicion", modelo=MODEL, fragmento=i, caracteres_entrada=len(chunk)) as metric:
+            result = cached_llm_call(("langchain_groq", MODEL, 0, EDIT_TEMPLATE, chunk),
+                                     lambda: edit_chain.run(text=chunk), metric)
+            metric['caracteres_salida'] = len(result)
+        return result
+
+    results = iter_with_retries(edit_chunk, list(enumerate(chunks, 1)), LLM_MAX_CONCURRENCY,
+                                retries=LLM_CHUNK_RETRIES, should_retry=reintentar_fragmento)
 
-    return "\n\n".join(edited_chunks)
+    for i, (chunk, (result, error)) in enumerate(zip(chunks, results), 1):
+        if error is not None:
+            st.warning(f"No se pudo editar el fragmento {i}, se incluye sin editar: {error}")
+            result = chunk
+        yield result if i == 1 else "\n\n" + result
+
+
+def edit_transcript_with_ai(transcript):
+    """
+    Edita la transcripción completa (ver iter_edicion) y retorna el texto editado.
+    """
+    return "".join(iter_edicion(transcript))
 
 
 def obtener_instrucciones(tipo_procesamiento):
@@ -162,65 +212,38 @@ def obtener_instrucciones(tipo_procesamiento):
 
 def split_text_intelligently(text, max_tokens=3000):
     """
-    Divide el texto en fragmentos manejables de aproximadamente max_tokens tokens sin recursión.
+    Divide el texto en fragmentos de hasta max_tokens tokens, contados con el
+    tokenizador y llenando cada fragmento con oraciones completas.
     """
-    paragraphs = text.split('\n\n')
-    chunks = []
-    current_chunk = []
-    current_token_count = 0
-
-    for paragraph in paragraphs:
-        # Aproximar tokens dividiendo la longitud en 4
-        paragraph_tokens = len(paragraph) // 4
-        
-        if current_token_count + paragraph_tokens > max_tokens:
-            chunks.append('\n\n'.join(current_chunk))
-            current_chunk = []
-            current_token_count = 0
-        
-        current_chunk.append(paragraph)
-        current_token_count += paragraph_tokens
-
-    if current_chunk:
-        chunks.append('\n\n'.join(current_chunk))
-
-    # Si algún fragmento sigue siendo demasiado grande, dividirlo nuevamente de manera iterativa
-    final_chunks = []
-    for chunk in chunks:
-        while len(chunk) // 4 > max_tokens:
-            split_index = len(chunk) // 2
-            part1, part2 = chunk[:split_index], chunk[split_index:]
-
-            split_point = part1.rfind(' ')
-            if split_point != -1:
-                part1, part2 = chunk[:split_point], chunk[split_point + 1:]
+    return pack_chunks(text, max_tokens)
 
-            final_chunks.append(part1)
-            chunk = part2
 
-        final_chunks.append(chunk)
-
-    return final_chunks
-
-
-def resumir_texto(text):
+def resumir_fragmentos(fragmentos, nivel):
     """
-    Resume el texto dividiéndolo en fragmentos y resumiendo cada uno.
+    Resume cada fragmento en paralelo (hasta LLM_MAX_CONCURRENCY a la vez) y
+    retorna los resúmenes en su orden original. En el nivel 1 los fragmentos
+    son partes de la transcripción; en los siguientes, grupos de resúmenes
+    parciales que se combinan en uno. Un fragmento que falla en todos sus
+    intentos se omite con un aviso.
     """
-    chunks = split_text_intelligently(text, max_tokens=2500)  # Ajusta un límite más pequeño para permitir tokens de respuesta
-    resuming_results = []
+    if nivel == 1:
+        instruccion = "Resume el siguiente fragmento para reducir su longitud manteniendo los puntos clave"
+    else:
+        instruccion = ("Combina los siguientes resúmenes parciales, que son partes consecutivas de una misma "
+                       "transcripción, en un único resumen que conserve los puntos clave sin repetirlos")
 
-    for i, chunk in enumerate(chunks, 1):
+    def resumir_fragmento(indexed_chunk):
+        i, chunk = indexed_chunk
         prompt_resumen = f"""
-        Eres un experto en resumen de transcripciones. Resume el siguiente fragmento para reducir su longitud manteniendo los puntos clave:
+        Eres un experto en resumen de transcripciones. {instruccion}:
 
         Fragmento:
         {chunk}
 
         Resumen:
         """
-        try:
-            resumen_completion = client.chat.completions.create(
+        with timed("llm_resumen", modelo=MODEL, nivel=nivel, fragmento=i, caracteres_entrada=len(chunk)) as metric:
+            solicitud = dict(
                 messages=[
                     {"role": "user", "content": prompt_resumen}
                 ],
@@ -230,28 +253,117 @@ def resumir_texto(text):
                 top_p=0.9,
                 stop=None
             )
-            resumen = resumen_completion.choices[0].message.content
-            resuming_results.append(resumen)
-        except Exception as e:
-            st.error(f"Error al resumir fragmento {i}: {e}")
-            return ""
 
-    return " ".join(resuming_results)
+            def llamar_modelo():
+                resumen_completion = call_with_retries(client.chat.completions.create, **solicitud)
+                metric.update(token_usage(resumen_completion))
+                return resumen_completion.choices[0].message.content
+
+            return cached_llm_call(("groq", solicitud), llamar_modelo, metric)
+
+    results = map_with_retries(resumir_fragmento, list(enumerate(fragmentos, 1)), LLM_MAX_CONCURRENCY,
+                               retries=LLM_CHUNK_RETRIES, should_retry=reintentar_fragmento)
 
+    resumenes = []
+    for i, (resumen, error) in enumerate(results, 1):
+        if error is not None:
+            st.warning(f"Error al resumir fragmento {i} (nivel {nivel}), se omite del resumen: {error}")
+            continue
+        resumenes.append(resumen)
+    return resumenes
 
-def procesar_transcripcion(text, tipo_procesamiento):
+
+def agrupar_resumenes(resumenes, fan_out, max_tokens):
+    """
+    Agrupa resúmenes consecutivos de a fan_out como máximo, sin que un grupo
+    supere max_tokens tokens (un resumen que por sí solo los excede queda solo).
+    """
+    grupos = []
+    actual, tokens_actual = [], 0
+    for resumen, tokens in zip(resumenes, [count_tokens(resumen) for resumen in resumenes]):
+        if actual and (len(actual) >= fan_out or tokens_actual + tokens > max_tokens):
+            grupos.append("\n\n".join(actual))
+            actual, tokens_actual = [], 0
+        actual.append(resumen)
+        tokens_actual += tokens
+    if actual:
+        grupos.append("\n\n".join(actual))
+    return grupos
+
+
+def resumir_texto(text, max_tokens=FINAL_PROMPT_TOKENS, fan_out=SUMMARY_FAN_OUT):
+    """
+    Resume el texto hasta que quepa en max_tokens tokens con un map-reduce de
+    varios niveles: primero se resume cada fragmento de la transcripción y
+    luego, mientras los resúmenes unidos sigan siendo muy largos, se combinan
+    de a fan_out en paralelo. Cada nivel divide la cantidad de resúmenes por
+    fan_out, así que la profundidad crece con el logaritmo del largo del texto.
+
+    Args:
+        text (str): Texto a resumir.
+        max_tokens (int): Tokens máximos del resultado.
+        fan_out (int): Resúmenes que se combinan en cada llamada de los niveles superiores (mínimo 2).
+    Returns:
+        Tuple[str, int]: Resumen y cantidad de niveles usados; ("", niveles) si no se pudo resumir nada.
+    """
+    if fan_out < 2:
+        raise ValueError("fan_out debe ser al menos 2")
+
+    fragmentos = split_text_intelligently(text, max_tokens=SUMMARY_CHUNK_TOKENS)  # Ajusta un límite más pequeño para permitir tokens de respuesta
+    nivel = 0
+    while True:
+        nivel += 1
+        resumenes = resumir_fragmentos(fragmentos, nivel)
+        if not resumenes:
+            st.error("No se pudo resumir ningún fragmento del texto")
+            return "", nivel
+
+        resumen = "\n\n".join(resumenes)
+        tokens = count_tokens(resumen)
+        logging.info(f"Nivel {nivel} del resumen: {len(fragmentos)} fragmentos, {len(resumenes)} resúmenes, {tokens} tokens")
+        if tokens <= max_tokens or len(resumenes) == 1:
+            return resumen, nivel
+        fragmentos = agrupar_resumenes(resumenes, fan_out, SUMMARY_CHUNK_TOKENS)
+
+
+def transmitir_respuesta(solicitud, campos_metrica):
+    """
+    Llama al modelo en modo streaming y entrega el texto de la respuesta a
+    medida que llega, usando la caché de respuestas.
+    """
+    with timed("llm_procesar", streaming=True, **campos_metrica) as metric:
+        def stream():
+            chunks = call_with_retries(client.chat.completions.create, stream=True, **solicitud)
+            for chunk in chunks:
+                # Groq informa los tokens usados en el último fragmento
+                if chunk.x_groq is not None:
+                    metric.update(token_usage(chunk.x_groq))
+                if chunk.choices:
+                    yield chunk.choices[0].delta.content
+
+        yield from cached_llm_stream(("groq", solicitud), stream, metric)
+
+
+def procesar_transcripcion(text, tipo_procesamiento, en_vivo=False):
     """
     Procesa la transcripción según el tipo de procesamiento seleccionado.
+    Con en_vivo=True el resultado se escribe en la página a medida que se
+    genera (la edición profesional, fragmento por fragmento) y además se retorna.
     """
     if tipo_procesamiento == "Edición Profesional":
+        if en_vivo:
+            return st.write_stream(iter_edicion(text))
         return edit_transcript_with_ai(text)
 
     # Para otros tipos de procesamiento, mantener el flujo original
-    estimated_tokens = len(text) // 4
+    estimated_tokens = count_tokens(text)
 
-    # Si estimamos que el texto es muy largo, resumimos primero
-    if estimated_tokens > 3000:
-       text = resumir_texto(text)
+    # Si el texto es muy largo, se resume por niveles hasta que quepa en el prompt final
+    if estimated_tokens > FINAL_PROMPT_TOKENS:
+        text, niveles = resumir_texto(text)
+        if not text:
+            return ""
+        st.caption(f"Texto resumido en {niveles} niveles (fan-out {SUMMARY_FAN_OUT}) antes del procesamiento final")
 
     instrucciones = obtener_instrucciones(tipo_procesamiento)
 
@@ -267,25 +379,36 @@ def procesar_transcripcion(text, tipo_procesamiento):
     Resultado:
     """
 
+    solicitud = dict(
+        messages=[
+            {
+                "role": "system", 
+                "content": "Eres un procesador experto de transcripciones."
+            },
+            {
+                "role": "user", 
+                "content": prompt
+            }
+        ],
+        model=MODEL,
+        max_tokens=1500,
+        temperature=0,
+        top_p=0.9,
+        stop=None
+    )
+    campos_metrica = dict(modelo=MODEL, tipo=tipo_procesamiento, caracteres_entrada=len(prompt))
+
     try:
-        chat_completion = client.chat.completions.create(
-            messages=[
-                {
-                    "role": "system", 
-                    "content": "Eres un procesador experto de transcripciones."
-                },
-                {
-                    "role": "user", 
-                    "content": prompt
-                }
-            ],
-            model=MODEL,
-            max_tokens=1500,
-            temperature=0,
-            top_p=0.9,
-            stop=None
-        )
-        resultado_final = chat_completion.choices[0].message.content
+        if en_vivo:
+            resultado_final = st.write_stream(transmitir_respuesta(solicitud, campos_metrica))
+        else:
+            with timed("llm_procesar", **campos_metrica) as metric:
+                def llamar_modelo():
+                    chat_completion = call_with_retries(client.chat.completions.create, **solicitud)
+                    metric.update(token_usage(chat_completion))
+                    return chat_completion.choices[0].message.content
+
+                resultado_final = cached_llm_call(("groq", solicitud), llamar_modelo, metric)
     except Exception as e:
         st.error(f"Error al procesar el texto: {e}")
         return ""
@@ -305,6 +428,9 @@ def main():
 
     input_type = st.sidebar.radio("Selecciona el tipo de entrada", ["Archivo CSV", "Texto directo"])
 
+    if st.sidebar.checkbox("Mostrar métricas de rendimiento", value=False):
+        show_debug_panel()
+
     text = ""
 
     if input_type == "Archivo CSV":
@@ -320,16 +446,16 @@ def main():
         text = st.sidebar.text_area("Pega tu transcripción aquí", height=300)
 
     if text:
-        st.info(f"Longitud del texto: {len(text)} caracteres")
+        st.info(f"Longitud del texto: {len(text)} caracteres ({count_tokens(text)} tokens)")
         tipo_procesamiento = st.selectbox("Selecciona el tipo de procesamiento", ["Edición Profesional", "Minuta", "Resumen", "Oportunidades"])
 
         if st.button("Procesar Transcripción"):
+            # El resultado se muestra a medida que se genera
+            st.subheader("Resultado:")
             with st.spinner('Procesando transcripción... puede tardar varios minutos...'):
-                resultado = procesar_transcripcion(text, tipo_procesamiento)
+                resultado = procesar_transcripcion(text, tipo_procesamiento, en_vivo=True)
 
             if resultado:
-                st.subheader("Resultado:")
-                st.write(resultado)
                 st.download_button(
                     label="Descargar Resultado",
                     data=resultado,
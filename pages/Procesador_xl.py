@@ -3,10 +3,14 @@ import pandas as pd
 import os
 import google.generativeai as genai
 
+from settings import get_secret
+from metrics import timed, token_usage, show_debug_panel
+from llm_cache import cached_llm_call, cached_llm_stream
+
 # Configuración de la clave API de Groq
 
 
-GEMMINI_API_KEY = st.secrets["GEMMINI_API_KEY"]
+GEMMINI_API_KEY = get_secret("GEMMINI_API_KEY")
 
 # Configurar API de Gemini
 genai.configure(api_key=GEMMINI_API_KEY) 
@@ -50,9 +54,33 @@ def obtener_instrucciones(tipo_procesamiento):
     return instrucciones.get(tipo_procesamiento, "")
 
 
-def procesar_transcripcion(text, tipo_procesamiento):
+def transmitir_respuesta(prompt, campos_metrica):
+    """
+    Llama a Gemini en modo streaming y entrega el texto de la respuesta a
+    medida que llega, usando la caché de respuestas.
+    """
+    with timed("llm_procesar_gemini", streaming=True, **campos_metrica) as metric:
+        def stream():
+            chunks = model.generate_content(prompt,
+                                            generation_config=genai.GenerationConfig(
+                                                max_output_tokens=2000,
+                                                temperature=0
+                                            ),
+                                            stream=True)
+            for chunk in chunks:
+                # El último fragmento trae el total de tokens usados
+                metric.update(token_usage(chunk))
+                if chunk.parts:
+                    yield chunk.text
+
+        yield from cached_llm_stream(("gemini", model.model_name, prompt, 2000, 0), stream, metric)
+
+
+def procesar_transcripcion(text, tipo_procesamiento, en_vivo=False):
     """
     Procesa la transcripción según el tipo de procesamiento seleccionado.
+    Con en_vivo=True el resultado se escribe en la página a medida que se
+    genera y además se retorna.
     """
     instrucciones = obtener_instrucciones(tipo_procesamiento)
 
@@ -68,13 +96,23 @@ def procesar_transcripcion(text, tipo_procesamiento):
     Resultado:
     """
 
+    campos_metrica = dict(modelo=model.model_name, tipo=tipo_procesamiento, caracteres_entrada=len(prompt))
+
     try:
-        chat_completion = model.generate_content(prompt,
-                                  generation_config=genai.GenerationConfig(
-                                      max_output_tokens=2000,
-                                      temperature=0
-                                  ))
-        resultado_final = chat_completion.text
+        if en_vivo:
+            resultado_final = st.write_stream(transmitir_respuesta(prompt, campos_metrica))
+        else:
+            with timed("llm_procesar_gemini", **campos_metrica) as metric:
+                def llamar_modelo():
+                    chat_completion = model.generate_content(prompt,
+                                              generation_config=genai.GenerationConfig(
+                                                  max_output_tokens=2000,
+                                                  temperature=0
+                                              ))
+                    metric.update(token_usage(chat_completion))
+                    return chat_completion.text
+
+                resultado_final = cached_llm_call(("gemini", model.model_name, prompt, 2000, 0), llamar_modelo, metric)
     except Exception as e:
         st.error(f"Error al procesar el texto: {e}")
         return ""
@@ -94,6 +132,9 @@ def main():
 
     input_type = st.sidebar.radio("Selecciona el tipo de entrada", ["Archivo CSV", "Texto directo"])
 
+    if st.sidebar.checkbox("Mostrar métricas de rendimiento", value=False):
+        show_debug_panel()
+
     text = ""
 
     if input_type == "Archivo CSV":
@@ -113,12 +154,12 @@ def main():
         tipo_procesamiento = st.selectbox("Selecciona el tipo de procesamiento", ["Minuta", "Resumen"])
 
         if st.button("Procesar Transcripción"):
+            # El resultado se muestra a medida que se genera
+            st.subheader("Resultado:")
             with st.spinner('Procesando transcripción... puede tardar varios minutos...'):
-                resultado = procesar_transcripcion(text, tipo_procesamiento)
+                resultado = procesar_transcripcion(text, tipo_procesamiento, en_vivo=True)
 
             if resultado:
-                st.subheader("Resultado:")
-                st.write(resultado)
                 st.download_button(
                     label="Descargar Resultado",
                     data=resultado,
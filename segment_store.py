@@ -0,0 +1,204 @@
+import os
+import logging
+import threading
+from typing import Dict, List, Optional
+
+import numpy as np
+import pandas as pd
+import pyarrow as pa
+import pyarrow.parquet as pq
+
+
+class SegmentStore:
+    """
+    Segmentos de una transcripción guardados en columnas compactas: arreglos
+    enteros de inicio y fin (ms) y un único buffer UTF-8 con los textos,
+    delimitados por un arreglo de offsets (el mismo formato de las cadenas de
+    Arrow). Evita tener un diccionario y un objeto str por segmento.
+
+    Se guarda y se carga como Parquet (compacto en disco) o como archivo
+    Arrow IPC (.arrow), que al abrirse se mapea en memoria sin copiar los datos. Se usa
+    para persistir transcripciones: la caché de la aplicación (SegmentCache)
+    y los archivos de transcribir_lote.py.
+    """
+
+    def __init__(self, start: np.ndarray, end: np.ndarray, offsets: np.ndarray, data):
+        self.start = np.asarray(start, dtype=np.int64)
+        self.end = np.asarray(end, dtype=np.int64)
+        self.offsets = np.asarray(offsets)
+        self.data = data
+
+    @classmethod
+    def from_segments(cls, segments: List[Dict]) -> "SegmentStore":
+        """
+        Crea el almacén a partir de una lista de segmentos con las llaves start, end y text.
+        """
+        encoded = [(segment.get('text') or "").encode("utf-8") for segment in segments]
+        offsets = np.zeros(len(encoded) + 1, dtype=np.int64)
+        np.cumsum([len(text) for text in encoded], out=offsets[1:])
+        return cls(
+            np.fromiter((segment['start'] for segment in segments), dtype=np.int64, count=len(segments)),
+            np.fromiter((segment['end'] for segment in segments), dtype=np.int64, count=len(segments)),
+            offsets,
+            b"".join(encoded)
+        )
+
+    @classmethod
+    def from_dataframe(cls, df: pd.DataFrame) -> "SegmentStore":
+        """
+        Crea el almacén a partir de un DataFrame con columnas start, end (ms) y text.
+        """
+        return cls.from_arrow(pa.Table.from_pandas(df[['start', 'end', 'text']], preserve_index=False))
+
+    @classmethod
+    def from_arrow(cls, table: pa.Table) -> "SegmentStore":
+        """
+        Crea el almacén a partir de una tabla de Arrow con columnas start, end y
+        text, reutilizando sus buffers sin copiarlos cuando es posible.
+        """
+        text = table.column('text').combine_chunks().cast(pa.large_string()).fill_null("")
+        _, offsets_buffer, data_buffer = text.buffers()
+        offsets = np.frombuffer(offsets_buffer, dtype=np.int64)[text.offset:text.offset + len(text) + 1]
+        return cls(
+            table.column('start').to_numpy(),
+            table.column('end').to_numpy(),
+            offsets,
+            data_buffer if data_buffer is not None else b""
+        )
+
+    def __len__(self) -> int:
+        return len(self.start)
+
+    @property
+    def nbytes(self) -> int:
+        """
+        Memoria ocupada por los arreglos y el buffer de textos, en bytes.
+        """
+        return self.start.nbytes + self.end.nbytes + self.offsets.nbytes + len(memoryview(self.data))
+
+    def text(self, index: int) -> str:
+        """
+        Retorna el texto del segmento indicado.
+        """
+        return bytes(memoryview(self.data)[self.offsets[index]:self.offsets[index + 1]]).decode("utf-8")
+
+    def to_arrow(self) -> pa.Table:
+        """
+        Retorna los segmentos como tabla de Arrow, compartiendo los buffers del almacén.
+        """
+        text = pa.LargeStringArray.from_buffers(
+            len(self), pa.py_buffer(self.offsets.astype(np.int64, copy=False)), pa.py_buffer(self.data)
+        )
+        return pa.table({'start': self.start, 'end': self.end, 'text': text})
+
+    def to_segments(self) -> List[Dict]:
+        """
+        Retorna los segmentos como lista de diccionarios con las llaves start, end y text.
+        """
+        return [
+            {'start': int(start), 'end': int(end), 'text': self.text(i)}
+            for i, (start, end) in enumerate(zip(self.start, self.end))
+        ]
+
+    def to_dataframe(self) -> pd.DataFrame:
+        """
+        Retorna los segmentos como DataFrame con columnas start, end (ms) y text.
+        """
+        return self.to_arrow().to_pandas()
+
+    def save(self, path: str) -> None:
+        """
+        Guarda los segmentos en disco. Si la ruta termina en .arrow se usa el
+        formato Arrow IPC (mapeable en memoria); si no, Parquet comprimido.
+        """
+        table = self.to_arrow()
+        directory = os.path.dirname(path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        if path.endswith(".arrow"):
+            with pa.OSFile(path, "wb") as sink, pa.ipc.new_file(sink, table.schema) as writer:
+                writer.write_table(table)
+        else:
+            pq.write_table(table, path, compression="zstd")
+
+    @classmethod
+    def load(cls, path: str, memory_map: bool = True) -> "SegmentStore":
+        """
+        Carga segmentos guardados con save. Con memory_map=True el archivo se
+        mapea en memoria: en el formato .arrow los arreglos apuntan
+        directamente al archivo y solo se leen las páginas que se usan.
+        """
+        if path.endswith(".arrow"):
+            source = pa.memory_map(path, "r") if memory_map else pa.OSFile(path, "rb")
+            table = pa.ipc.open_file(source).read_all()
+        else:
+            table = pq.read_table(path, memory_map=memory_map)
+        return cls.from_arrow(table)
+
+
+class SegmentCache:
+    """
+    Caché persistente de transcripciones completas: cada entrada es un
+    archivo Parquet (ver SegmentStore.save) nombrado por su clave, en lugar
+    de una lista de diccionarios serializada como JSON. Al superar el tamaño
+    máximo se eliminan primero los archivos usados hace más tiempo.
+
+    Igual que DiskCache, cualquier error se registra y se trata como un fallo
+    de búsqueda: la caché nunca debe interrumpir el flujo principal.
+    """
+
+    def __init__(self, directory: str, max_bytes: int = 200 * 1024 * 1024):
+        self.directory = directory
+        self.max_bytes = max_bytes
+        self._lock = threading.Lock()
+        os.makedirs(directory, exist_ok=True)
+
+    def _path(self, key: str) -> str:
+        return os.path.join(self.directory, f"{key}.parquet")
+
+    def get(self, key: str) -> Optional[SegmentStore]:
+        """
+        Retorna los segmentos guardados con la clave o None si no existen.
+        Actualiza la fecha de modificación del archivo para el desalojo LRU.
+        """
+        path = self._path(key)
+        try:
+            if not os.path.exists(path):
+                return None
+            os.utime(path)
+            return SegmentStore.load(path)
+        except Exception as e:
+            logging.error(f"Error al leer la caché {path}: {e}")
+            return None
+
+    def set(self, key: str, store: SegmentStore) -> None:
+        """
+        Guarda los segmentos con la clave y elimina los archivos menos usados
+        hasta respetar el tamaño máximo.
+        """
+        path = self._path(key)
+        temp_path = f"{path}.{threading.get_ident()}.tmp"
+        try:
+            store.save(temp_path)
+            os.replace(temp_path, path)
+            with self._lock:
+                self._evict()
+        except Exception as e:
+            logging.error(f"Error al escribir en la caché {path}: {e}")
+            if os.path.exists(temp_path):
+                os.remove(temp_path)
+
+    def _evict(self) -> None:
+        entries = [
+            os.path.join(self.directory, name) for name in os.listdir(self.directory) if name.endswith(".parquet")
+        ]
+        entries = sorted(((os.path.getmtime(path), os.path.getsize(path), path) for path in entries), reverse=True)
+        total = sum(size for _, size, _ in entries)
+        expired = 0
+        while total > self.max_bytes and entries:
+            _, size, path = entries.pop()
+            os.remove(path)
+            total -= size
+            expired += 1
+        if expired:
+            logging.info(f"Caché {self.directory}: {expired} entradas desalojadas")
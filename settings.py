@@ -0,0 +1,25 @@
+import os
+
+import streamlit as st
+
+
+def get_secret(name: str) -> str:
+    """
+    Retorna un secreto buscándolo primero en las variables de entorno y luego
+    en .streamlit/secrets.toml, de modo que los scripts de línea de comandos
+    puedan ejecutarse sin Streamlit configurado.
+
+    Args:
+        name (str): Nombre del secreto (por ejemplo GROQ_API_KEY).
+    Returns:
+        str: Valor del secreto.
+    """
+    value = os.environ.get(name)
+    if value:
+        return value
+    try:
+        return st.secrets[name]
+    except (KeyError, FileNotFoundError) as e:
+        raise RuntimeError(
+            f"No se encontró {name}: defínelo como variable de entorno o en .streamlit/secrets.toml"
+        ) from e
@@ -0,0 +1,144 @@
+import os
+import re
+import math
+import logging
+import threading
+from typing import List
+
+# Codificación de tiktoken usada para contar tokens. Los modelos de Groq y
+# Gemini usan tokenizadores propios, pero cl100k_base se acerca mucho más
+# a ellos en español que contar caracteres.
+TOKENIZER_ENCODING = os.environ.get("TOKENIZER_ENCODING", "cl100k_base")
+
+# tiktoken descarga la codificación la primera vez que se usa. Se guarda junto
+# a las demás cachés para no repetir la descarga tras un reinicio; en un
+# servidor sin salida a internet basta con dejar el archivo ahí de antemano.
+os.environ.setdefault("TIKTOKEN_CACHE_DIR", os.path.join(os.environ.get("AUDIO_QUAI_CACHE_DIR", ".cache"), "tiktoken"))
+
+# Espera máxima por el tokenizador en la primera llamada; si no alcanza se usa la estimación
+TOKENIZER_LOAD_TIMEOUT_SECONDS = float(os.environ.get("TOKENIZER_LOAD_TIMEOUT", "3"))
+
+# Caracteres por token supuestos si tiktoken no está disponible (conservador para español)
+FALLBACK_CHARS_PER_TOKEN = 3.2
+
+SENTENCE_END = re.compile(r"(?<=[.!?…])\s+")
+PARAGRAPH_BREAK = re.compile(r"\n\s*\n")
+
+
+_tokenizer = None
+_loader = None
+_loader_lock = threading.Lock()
+
+
+def _load_tokenizer() -> None:
+    global _tokenizer
+    try:
+        import tiktoken
+        _tokenizer = tiktoken.get_encoding(TOKENIZER_ENCODING)
+    except Exception as e:
+        logging.warning(f"No se pudo cargar el tokenizador {TOKENIZER_ENCODING}, se estiman los tokens: {e}")
+
+
+def get_tokenizer():
+    """
+    Retorna el tokenizador de tiktoken, cargado una sola vez por proceso en
+    un hilo de fondo (la primera carga puede descargar la codificación). La
+    primera llamada espera hasta TOKENIZER_LOAD_TIMEOUT_SECONDS; mientras no
+    esté listo, o si tiktoken no está instalado o la descarga falla, retorna
+    None y el conteo usa una estimación por caracteres. Así una red que
+    descarta las conexiones no bloquea la carga de la página.
+    """
+    global _loader
+    with _loader_lock:
+        first_call = _loader is None
+        if first_call:
+            _loader = threading.Thread(target=_load_tokenizer, name="tokenizador", daemon=True)
+            _loader.start()
+    if first_call:
+        _loader.join(TOKENIZER_LOAD_TIMEOUT_SECONDS)
+        if _tokenizer is None and _loader.is_alive():
+            logging.warning(f"El tokenizador {TOKENIZER_ENCODING} no cargó en {TOKENIZER_LOAD_TIMEOUT_SECONDS} s, "
+                            "se estiman los tokens mientras tanto")
+    return _tokenizer
+
+
+def count_tokens(text: str) -> int:
+    """
+    Cuenta los tokens de un texto.
+    """
+    tokenizer = get_tokenizer()
+    if tokenizer is None:
+        return math.ceil(len(text) / FALLBACK_CHARS_PER_TOKEN)
+    return len(tokenizer.encode(text, disallowed_special=()))
+
+
+def _count_many(texts: List[str]) -> List[int]:
+    tokenizer = get_tokenizer()
+    if tokenizer is None:
+        return [math.ceil(len(text) / FALLBACK_CHARS_PER_TOKEN) for text in texts]
+    return [len(tokens) for tokens in tokenizer.encode_batch(texts, disallowed_special=())]
+
+
+def _split_long_sentence(sentence: str, max_tokens: int) -> List[str]:
+    """
+    Divide una oración que por sí sola excede max_tokens: por tokens si hay
+    tokenizador, o por palabras según la estimación.
+    """
+    tokenizer = get_tokenizer()
+    if tokenizer is not None:
+        tokens = tokenizer.encode(sentence, disallowed_special=())
+        return [tokenizer.decode(tokens[i:i + max_tokens]) for i in range(0, len(tokens), max_tokens)]
+
+    max_chars = int(max_tokens * FALLBACK_CHARS_PER_TOKEN)
+    pieces, current, current_chars = [], [], 0
+    for word in sentence.split():
+        if current and current_chars + 1 + len(word) > max_chars:
+            pieces.append(" ".join(current))
+            current, current_chars = [], 0
+        current_chars += len(word) + (1 if current else 0)
+        current.append(word)
+    if current:
+        pieces.append(" ".join(current))
+    return pieces
+
+
+def pack_chunks(text: str, max_tokens: int) -> List[str]:
+    """
+    Divide un texto en fragmentos de hasta max_tokens tokens, llenando cada
+    fragmento con oraciones completas hasta acercarse al límite. Los saltos
+    de párrafo se conservan dentro de cada fragmento; solo las oraciones que
+    por sí solas exceden el límite se cortan.
+
+    Args:
+        text (str): Texto a dividir.
+        max_tokens (int): Tokens máximos por fragmento.
+    Returns:
+        List[str]: Fragmentos en orden.
+    """
+    # Unidades: (oración, separador que la precede dentro del fragmento)
+    units = []
+    for paragraph in PARAGRAPH_BREAK.split(text.strip()):
+        for position, sentence in enumerate(SENTENCE_END.split(paragraph.strip())):
+            if sentence:
+                units.append((sentence, " " if position else "\n\n"))
+    if not units:
+        return []
+
+    chunks = []
+    current: List[str] = []
+    current_tokens = 0
+    for (sentence, joiner), tokens in zip(units, _count_many([sentence for sentence, _ in units])):
+        pieces = [(sentence, tokens)] if tokens <= max_tokens else [
+            (piece, count_tokens(piece)) for piece in _split_long_sentence(sentence, max_tokens)
+        ]
+        for k, (piece, piece_tokens) in enumerate(pieces):
+            # Se suma un token por el separador
+            if current and current_tokens + piece_tokens + 1 > max_tokens:
+                chunks.append("".join(current).strip())
+                current, current_tokens = [], 0
+            current.append(((joiner if k == 0 else " ") if current else "") + piece)
+            current_tokens += piece_tokens + (1 if len(current) > 1 else 0)
+
+    if current:
+        chunks.append("".join(current).strip())
+    return chunks
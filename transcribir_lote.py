@@ -0,0 +1,223 @@
+"""
+Transcripción por lotes sin interfaz gráfica.
+
+Transcribe todos los audios de uno o más directorios, archivos o manifiestos
+(archivos .txt con una ruta por línea) usando la misma canalización que la
+aplicación de Streamlit, y guarda una transcripción por audio en formato
+JSONL o Parquet. Los audios que ya tienen transcripción en el directorio de
+salida se omiten, de modo que el lote puede relanzarse tras una falla.
+
+Ejemplo:
+    GROQ_API_KEY=... python transcribir_lote.py grabaciones/ --contexto "Sesión del concejo" --salida transcripciones
+"""
+import os
+import sys
+import json
+import logging
+import argparse
+import traceback
+from typing import Dict, List, Optional, Tuple
+
+from concurrency import iter_completed
+from segment_store import SegmentStore
+from Transcriptor import (
+    transcribe_local_audio, get_checkpoint_store, TRANSCRIPTION_WORKERS, IN_MEMORY_CHUNKS, PROGRESSIVE_CHUNK_MS
+)
+from workspace import Workspace
+from audio_processing import ENCODING_PROFILES, DEFAULT_ENCODING_PROFILE
+
+# Extensiones que acepta el cargador de la aplicación
+AUDIO_EXTENSIONS = {".mp3", ".mp4", ".wav", ".m4a"}
+
+# Archivos que se transcriben a la vez (cada uno envía hasta TRANSCRIPTION_WORKERS segmentos en paralelo)
+BATCH_FILE_WORKERS = int(os.environ.get("BATCH_FILE_WORKERS", "2"))
+
+OUTPUT_EXTENSIONS = {"jsonl": ".jsonl", "parquet": ".parquet"}
+
+
+def collect_audio_files(inputs: List[str]) -> List[Tuple[str, str]]:
+    """
+    Reúne los audios a transcribir a partir de directorios (recorridos de
+    forma recursiva), archivos de audio sueltos y manifiestos .txt.
+
+    Args:
+        inputs (List[str]): Rutas indicadas en la línea de comandos.
+    Returns:
+        List[Tuple[str, str]]: Pares (ruta del audio, nombre relativo usado para la salida),
+            sin duplicados y en orden.
+    """
+    files = []
+    for entry in inputs:
+        if os.path.isdir(entry):
+            for root, _, names in os.walk(entry):
+                for name in sorted(names):
+                    if os.path.splitext(name)[1].lower() in AUDIO_EXTENSIONS:
+                        path = os.path.join(root, name)
+                        files.append((path, os.path.relpath(path, entry)))
+        elif entry.lower().endswith(".txt"):
+            base_dir = os.path.dirname(os.path.abspath(entry))
+            with open(entry, encoding="utf-8") as manifest:
+                for line in manifest:
+                    line = line.strip()
+                    if line and not line.startswith("#"):
+                        path = line if os.path.isabs(line) else os.path.join(base_dir, line)
+                        files.append((path, os.path.basename(path)))
+        else:
+            files.append((entry, os.path.basename(entry)))
+
+    seen = set()
+    unique = []
+    for path, name in sorted(files):
+        key = os.path.abspath(path)
+        if key not in seen:
+            seen.add(key)
+            unique.append((path, name))
+    return unique
+
+
+def output_path_for(name: str, output_dir: str, output_format: str) -> str:
+    """
+    Retorna la ruta de la transcripción de un audio dentro del directorio de salida.
+    """
+    return os.path.join(output_dir, os.path.splitext(name)[0] + OUTPUT_EXTENSIONS[output_format])
+
+
+def find_output_collisions(audio_files: List[Tuple[str, str]]) -> Dict[str, List[str]]:
+    """
+    Busca audios distintos que se guardarían en la misma ruta de salida (por
+    ejemplo a/x.mp3 y b/x.mp3 indicados como directorios o manifiestos
+    distintos, o x.mp3 y x.wav). Uno sobrescribiría al otro y los lotes
+    siguientes omitirían al segundo como si ya estuviera transcrito.
+
+    Args:
+        audio_files (List[Tuple[str, str]]): Pares (ruta del audio, ruta de salida).
+    Returns:
+        Dict[str, List[str]]: Rutas de salida repetidas y los audios que las comparten.
+    """
+    by_output: Dict[str, List[str]] = {}
+    for audio_path, output_path in audio_files:
+        by_output.setdefault(os.path.normcase(os.path.abspath(output_path)), []).append(audio_path)
+    return {output_path: paths for output_path, paths in by_output.items() if len(paths) > 1}
+
+
+def write_transcription(store: SegmentStore, path: str, output_format: str) -> None:
+    """
+    Guarda una transcripción de forma atómica: se escribe en un archivo
+    temporal y se renombra al terminar, para que un archivo a medio escribir
+    nunca se confunda con uno terminado.
+    """
+    os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+    temp_path = path + ".tmp"
+    if output_format == "parquet":
+        store.save(temp_path + ".parquet")
+        os.replace(temp_path + ".parquet", path)
+        return
+
+    with open(temp_path, "w", encoding="utf-8") as f:
+        for segment in store.to_segments():
+            f.write(json.dumps(segment, ensure_ascii=False) + "\n")
+    os.replace(temp_path, path)
+
+
+def transcribe_file(audio_path: str, output_path: str, context: str, encoding_profile: str,
+                    skip_silence: bool, segment_workers: int, output_format: str) -> Optional[str]:
+    """
+    Transcribe un audio y guarda el resultado. Los errores se registran y se
+    retornan en lugar de propagarse, para que un archivo fallido no detenga el lote.
+    Un audio ilegible o sin segmentos transcritos cuenta como error y no deja
+    archivo de salida.
+
+    Returns:
+        Optional[str]: Mensaje de error, o None si la transcripción terminó bien.
+    """
+    try:
+        with Workspace(in_memory=IN_MEMORY_CHUNKS) as workspace:
+            df = transcribe_local_audio(
+                audio_path, chunk_size=None, context=context, workspace=workspace,
+                max_workers=segment_workers, encoding_profile=encoding_profile,
+                skip_silence=skip_silence, checkpoints=get_checkpoint_store(),
+                # Segmentos cortos: un audio que falla se retoma desde el último segmento guardado
+                max_chunk_ms=PROGRESSIVE_CHUNK_MS
+            )
+        if df.empty:
+            # Sin archivo de salida el audio se vuelve a intentar en el próximo lote
+            raise ValueError(f"La transcripción de {audio_path} no produjo segmentos")
+        write_transcription(SegmentStore.from_dataframe(df), output_path, output_format)
+        logging.info(f"Transcripción de {audio_path} guardada en {output_path} ({len(df)} segmentos)")
+        return None
+    except Exception as e:
+        logging.error(f"Error al transcribir {audio_path}: {e}")
+        logging.error(traceback.format_exc())
+        return str(e)
+
+
+def parse_args(argv: Optional[List[str]] = None) -> argparse.Namespace:
+    parser = argparse.ArgumentParser(description="Transcribe por lotes archivos de audio con Groq.")
+    parser.add_argument("entradas", nargs="+",
+                        help="Directorios, archivos de audio o manifiestos .txt (una ruta por línea)")
+    parser.add_argument("--salida", default="transcripciones", help="Directorio donde se guardan las transcripciones")
+    parser.add_argument("--formato", choices=sorted(OUTPUT_EXTENSIONS), default="jsonl",
+                        help="Formato de salida: un segmento JSON por línea o Parquet")
+    contexto = parser.add_mutually_exclusive_group(required=True)
+    contexto.add_argument("--contexto", help="Contexto de la transcripción")
+    contexto.add_argument("--contexto-archivo", help="Archivo de texto con el contexto de la transcripción")
+    parser.add_argument("--perfil", choices=list(ENCODING_PROFILES), default=DEFAULT_ENCODING_PROFILE,
+                        help="Perfil de codificación de los segmentos")
+    parser.add_argument("--omitir-silencios", action="store_true", help="No enviar a la API los tramos sin voz")
+    parser.add_argument("--archivos-simultaneos", type=int, default=BATCH_FILE_WORKERS,
+                        help="Número de archivos que se transcriben a la vez")
+    parser.add_argument("--segmentos-simultaneos", type=int, default=TRANSCRIPTION_WORKERS,
+                        help="Número de segmentos de un mismo archivo que se envían a la vez")
+    parser.add_argument("--sobrescribir", action="store_true",
+                        help="Transcribir también los audios que ya tienen transcripción")
+    return parser.parse_args(argv)
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    args = parse_args(argv)
+    if args.contexto_archivo:
+        with open(args.contexto_archivo, encoding="utf-8") as f:
+            context = f.read().strip()
+    else:
+        context = args.contexto
+
+    audio_files = [
+        (audio_path, output_path_for(name, args.salida, args.formato))
+        for audio_path, name in collect_audio_files(args.entradas)
+    ]
+    collisions = find_output_collisions(audio_files)
+    if collisions:
+        for output_path, audio_paths in collisions.items():
+            logging.error(f"Varios audios tendrían la misma salida {output_path}: {', '.join(audio_paths)}")
+        logging.error("Renombra los audios o transcríbelos en lotes separados; no se transcribió ningún audio")
+        return 2
+
+    pending = []
+    skipped = 0
+    for audio_path, output_path in audio_files:
+        if os.path.exists(output_path) and not args.sobrescribir:
+            skipped += 1
+            continue
+        pending.append((audio_path, output_path))
+
+    logging.info(f"{len(pending)} audios por transcribir, {skipped} ya transcritos")
+
+    def run(job: Tuple[str, str]) -> Optional[str]:
+        audio_path, output_path = job
+        return transcribe_file(audio_path, output_path, context, args.perfil, args.omitir_silencios,
+                               args.segmentos_simultaneos, args.formato)
+
+    failed = []
+    for completed, (index, error) in enumerate(iter_completed(run, pending, args.archivos_simultaneos), start=1):
+        if error is not None:
+            failed.append(pending[index][0])
+        logging.info(f"Progreso del lote: {completed}/{len(pending)} audios")
+
+    logging.info(f"Lote terminado: {len(pending) - len(failed)} transcritos, {skipped} omitidos, {len(failed)} con error")
+    for audio_path in failed:
+        logging.error(f"Sin transcripción: {audio_path}")
+    return 1 if failed else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
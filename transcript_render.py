@@ -0,0 +1,155 @@
+import json
+from typing import List, Sequence, Tuple
+
+import numpy as np
+import pandas as pd
+
+# Caracteres que se escapan en el texto de los segmentos antes de insertarlo en el HTML
+HTML_ESCAPES = [("&", "&amp;"), ("<", "&lt;"), (">", "&gt;"), ('"', "&quot;"), ("'", "&#x27;")]
+
+
+# Tablas de dígitos con ceros a la izquierda, indexadas por valor
+_TWO_DIGITS = np.array([f"{i:02d}" for i in range(100)], dtype=object)
+_THREE_DIGITS = np.array([f"{i:03d}" for i in range(1000)], dtype=object)
+
+
+def _clock_parts(milliseconds: Sequence[float]) -> Tuple[np.ndarray, np.ndarray, np.ndarray, np.ndarray]:
+    """
+    Separa un arreglo de milisegundos en horas, minutos, segundos y
+    milisegundos, en una sola pasada vectorizada. Las horas se retornan como
+    enteros y el resto como texto con ceros a la izquierda.
+    """
+    ms = np.floor(np.asarray(milliseconds, dtype=np.float64)).astype(np.int64)
+    hours, rest = np.divmod(ms, 3_600_000)
+    minutes, rest = np.divmod(rest, 60_000)
+    seconds, millis = np.divmod(rest, 1000)
+    return hours, _TWO_DIGITS[minutes], _TWO_DIGITS[seconds], _THREE_DIGITS[millis]
+
+
+def _hours_text(hours: np.ndarray, width: int) -> np.ndarray:
+    """
+    Convierte las horas a texto con al menos width dígitos.
+    """
+    table = _TWO_DIGITS if width == 2 else np.array([str(i) for i in range(100)], dtype=object)
+    text = table[np.minimum(hours, 99)]
+    long = hours > 99
+    if long.any():
+        text[long] = hours[long].astype(str)
+    return text
+
+
+def format_timestamps(milliseconds: Sequence[float]) -> pd.Series:
+    """
+    Convierte un arreglo de milisegundos al formato H:MM:SS que usa
+    format_timestamp, sin recorrer las filas una por una.
+
+    Args:
+        milliseconds (Sequence[float]): Tiempos en milisegundos.
+    Returns:
+        pd.Series: Tiempos formateados.
+    """
+    hours, minutes, seconds, _ = _clock_parts(milliseconds)
+    return pd.Series(_hours_text(hours, 1) + ":" + minutes + ":" + seconds, dtype=object)
+
+
+def format_cue_timestamps(milliseconds: Sequence[float], separator: str) -> pd.Series:
+    """
+    Convierte un arreglo de milisegundos al formato HH:MM:SS<sep>mmm de los
+    subtítulos (',' para SRT y '.' para WebVTT).
+    """
+    hours, minutes, seconds, millis = _clock_parts(milliseconds)
+    return pd.Series(_hours_text(hours, 2) + ":" + minutes + ":" + seconds + separator + millis, dtype=object)
+
+
+def escape_html(texts: pd.Series) -> pd.Series:
+    """
+    Escapa los caracteres especiales de HTML de una serie de textos.
+    """
+    escaped = texts.fillna("").astype(str)
+    for char, entity in HTML_ESCAPES:
+        escaped = escaped.str.replace(char, entity, regex=False)
+    return escaped
+
+
+def build_paragraphs_html(texts: pd.Series, paragraph_size: int) -> List[str]:
+    """
+    Construye el HTML de cada párrafo de la transcripción: un <span> editable
+    por segmento, agrupados de a paragraph_size segmentos.
+
+    Args:
+        texts (pd.Series): Texto de cada segmento, en orden.
+        paragraph_size (int): Segmentos por párrafo.
+    Returns:
+        List[str]: HTML de cada párrafo (sin la etiqueta <p>).
+    """
+    indexes = np.arange(len(texts)).astype(str).astype(object)
+    spans = ("<span data-index='" + indexes + "' contenteditable='true'>"
+             + escape_html(texts).to_numpy(dtype=object) + " </span>").tolist()
+    return ["".join(spans[i:i + paragraph_size]) for i in range(0, len(spans), paragraph_size)]
+
+
+def build_transcript_payload(df: pd.DataFrame, paragraph_size: int) -> str:
+    """
+    Serializa los segmentos y el HTML de los párrafos como JSON para el
+    componente de la transcripción. Se escapa "</" para que el contenido no
+    cierre el <script> donde se inserta.
+
+    Args:
+        df (pd.DataFrame): Transcripción con columnas start, end (ms) y text.
+        paragraph_size (int): Segmentos por párrafo.
+    Returns:
+        str: Objeto JSON con las listas start, end (segundos), text y paragraphs.
+    """
+    return json.dumps({
+        'start': (df['start'] / 1000).tolist(),
+        'end': (df['end'] / 1000).tolist(),
+        'text': df['text'].fillna("").astype(str).tolist(),
+        'paragraphs': build_paragraphs_html(df['text'], paragraph_size)
+    }, ensure_ascii=False).replace("</", "<\\/")
+
+
+def _cue_texts(df: pd.DataFrame) -> pd.Series:
+    """
+    Texto de cada segmento en una sola línea, como lo requieren los subtítulos.
+    """
+    texts = df['text'].fillna("").astype(str)
+    return texts.str.replace("\r", " ", regex=False).str.replace("\n", " ", regex=False).str.strip()
+
+
+def to_csv(df: pd.DataFrame) -> str:
+    """
+    Exporta la transcripción a CSV con las columnas start_time, end_time y
+    text, con todos los campos entre comillas.
+    """
+    texts = _cue_texts(df).str.replace('"', '""', regex=False).to_numpy(dtype=object)
+    rows = ('"' + format_timestamps(df['start']).to_numpy() + '","' + format_timestamps(df['end']).to_numpy()
+            + '","' + texts + '"')
+    return "start_time,end_time,text\n" + "".join((rows + "\n").tolist())
+
+
+def to_srt(df: pd.DataFrame) -> str:
+    """
+    Exporta la transcripción como subtítulos SRT.
+    """
+    if df.empty:
+        return ""
+    cues = (np.arange(1, len(df) + 1).astype(str).astype(object) + "\n"
+            + format_cue_timestamps(df['start'], ",").to_numpy() + " --> "
+            + format_cue_timestamps(df['end'], ",").to_numpy() + "\n"
+            + _cue_texts(df).to_numpy(dtype=object))
+    return "\n\n".join(cues.tolist()) + "\n"
+
+
+def to_vtt(df: pd.DataFrame) -> str:
+    """
+    Exporta la transcripción como subtítulos WebVTT.
+    """
+    if df.empty:
+        return "WEBVTT\n"
+    # En WebVTT el texto admite etiquetas, por lo que se escapan &, < y >
+    texts = _cue_texts(df)
+    for char, entity in HTML_ESCAPES[:3]:
+        texts = texts.str.replace(char, entity, regex=False)
+    cues = (format_cue_timestamps(df['start'], ".").to_numpy() + " --> "
+            + format_cue_timestamps(df['end'], ".").to_numpy() + "\n" + texts.to_numpy(dtype=object))
+    return "WEBVTT\n\n" + "\n\n".join(cues.tolist()) + "\n"
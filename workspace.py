@@ -0,0 +1,59 @@
+import os
+import shutil
+import logging
+import tempfile
+from typing import Optional
+
+# Directorio base de los espacios de trabajo (por defecto, el temporal del sistema)
+WORKSPACE_BASE_DIR = os.environ.get("AUDIO_QUAI_TMP_DIR") or None
+
+
+class Workspace:
+    """
+    Área temporal aislada para un trabajo de transcripción.
+
+    Cada instancia crea un directorio único, de modo que varios usuarios
+    pueden transcribir a la vez sin sobrescribir ni borrar los archivos de
+    otros. Se usa como context manager y el directorio se elimina al salir,
+    incluso si el trabajo falla.
+
+    Con in_memory=True los segmentos de audio no se escriben en disco: se
+    codifican a un buffer y se envían a la API directamente desde memoria.
+    """
+
+    def __init__(self, in_memory: bool = False, base_dir: Optional[str] = WORKSPACE_BASE_DIR):
+        self.in_memory = in_memory
+        if base_dir:
+            os.makedirs(base_dir, exist_ok=True)
+        self.path = tempfile.mkdtemp(prefix="audio_quai_", dir=base_dir)
+
+    def file_path(self, name: str) -> str:
+        """
+        Retorna la ruta de un archivo dentro del espacio de trabajo.
+        Solo se conserva el nombre base para evitar escribir fuera del directorio.
+        """
+        return os.path.join(self.path, os.path.basename(name))
+
+    def subdir(self, name: str) -> str:
+        """
+        Crea (si no existe) y retorna un subdirectorio del espacio de trabajo.
+        """
+        path = os.path.join(self.path, name)
+        os.makedirs(path, exist_ok=True)
+        return path
+
+    def cleanup(self) -> None:
+        """
+        Elimina el directorio del espacio de trabajo y todo su contenido.
+        """
+        if os.path.exists(self.path):
+            try:
+                shutil.rmtree(self.path)
+            except Exception as e:
+                logging.error(f"Error al eliminar el espacio de trabajo {self.path}: {e}")
+
+    def __enter__(self) -> "Workspace":
+        return self
+
+    def __exit__(self, exc_type, exc_value, tb) -> None:
+        self.cleanup()